@@ -0,0 +1,8 @@
+#!/bin/bash -xe
+
+# Script that starts (or stops, or checks) a warm browser server, which test runs connect to instead of launching a browser
+# Usage: ./scripts/browser-server.sh start|stop|status [--browser chromium] [--idle 1800]
+
+dir="$(dirname -- "$(which -- "$0" 2>/dev/null || realpath -- "./$0")")"
+cd "$dir/.."
+PYTHONPATH=tests poetry run python -m tooling.BrowserServer "$@"
@@ -1,8 +1,14 @@
+from typing import Dict
+
+import pytest
 from faker import Faker
 from pages.base.Currency import Currency
-from pages.customer.DetailsCustomer import CustomerMessages
+from pages.base.Step import Checkpoint
+from pages.customer.DetailsCustomer import CustomerMessages, DetailsCustomers
 from pages.customer.LoginCustomer import LoginCustomer
 from pages.manager.LoginManager import LoginManager
+from playwright.sync_api import Page
+from tooling.Soak import SoakRecorder
 
 
 def test_login_and_logout_as_customer(login_customer: LoginCustomer):
@@ -17,15 +23,89 @@ def test_login_and_logout_as_customer(login_customer: LoginCustomer):
     assert [] != login_customer.get_available_customers_to_login()
 
 
-def test_deposit_withdraw_customer(
-    login_manager: LoginManager, faker: Faker, login_customer: LoginCustomer
-):
+def _deposit_withdraw(details_page: DetailsCustomers, currency: Currency):
     """
-    Ensures that a customer can deposit, then withdraw, and see all the transactions in their account
+    Deposits, then withdraws, checking the account summary and the transactions after each.
 
     BUG: The transactions page is often not showing the rows at all, so we have to
     retry `go_to_transactions` some times until we see the amount of rows we expect in each case.
     """
+    details_page.expect_account_details(balance=0, currency=currency)
+
+    # Check we can deposit money and see the updated account summary
+    details_page.deposit(amount=100)
+    details_page.expect_account_details(balance=100, currency=currency)
+    details_page.expect_message(CustomerMessages.DEPOSIT_SUCCESSFUL)
+    details_page.go_to_transactions(expected_count=2)
+    details_page.expect_transaction_row_contains(balance=100, transaction_type="Credit")
+    details_page.back_to_account_summary()
+
+    # Check we can withdraw money and see the updated account summary
+    details_page.withdraw(amount=50)
+    details_page.expect_account_details(balance=50, currency=currency)
+    details_page.expect_message(CustomerMessages.WITHDRAWAL_SUCCESSFUL)
+    details_page.go_to_transactions(expected_count=3)
+    details_page.expect_transaction_row_contains(balance=50, transaction_type="Debit")
+    details_page.back_to_account_summary()
+    details_page.expect_account_details(balance=50, currency=currency)
+
+
+@pytest.mark.dataset("customer_with_accounts")
+def test_customer_sees_accounts_in_every_currency(
+    login_customer: LoginCustomer, dataset: Dict
+):
+    """A customer with accounts in every currency can see each of them, with no balance yet"""
+    login_customer.navigate()
+    details_page = login_customer.login(label=dataset["full_name"])
+    for index, currency in enumerate(dataset["currencies"]):
+        details_page.select_account(index)
+        details_page.expect_account_details(balance=0, currency=currency)
+
+
+@pytest.mark.dataset("customer_with_accounts")
+def test_deposit_withdraw_customer(login_customer: LoginCustomer, dataset: Dict):
+    """
+    Ensures that a customer can deposit, then withdraw, and see all the transactions in their account
+    (on their own copy of the shared customer, so other tests still see empty accounts)
+    """
+    currency = Currency.POUND
+
+    # Login with the customer of the dataset, in their account with our currency
+    login_customer.navigate()
+    details_page = login_customer.login(label=dataset["full_name"])
+    details_page.select_account(dataset["currencies"].index(currency))
+    _deposit_withdraw(details_page, currency)
+
+
+@pytest.mark.dataset("customer_with_accounts")
+def test_customer_can_go_on_after_checkpoint_restore(
+    login_customer: LoginCustomer, dataset: Dict, page: Page
+):
+    """
+    A customer step still works once the browser is brought back to a checkpoint in the account page,
+    as step retries do: the route and localStorage come back (undoing what came after), then the page reloads
+    """
+    currency = dataset["currencies"][0]
+    login_customer.navigate()
+    details_page = login_customer.login(label=dataset["full_name"])
+    details_page.select_account(0)
+    checkpoint = Checkpoint(page)
+    details_page.deposit(amount=100)
+    details_page.expect_account_details(balance=100, currency=currency)
+
+    # The deposit is undone, and the customer can deposit again
+    checkpoint.restore(page)
+    details_page.deposit(amount=50)
+    details_page.expect_message(CustomerMessages.DEPOSIT_SUCCESSFUL)
+    details_page.expect_account_details(balance=50, currency=currency)
+
+
+def _deposit_withdraw_new_customer(
+    login_manager: LoginManager, faker: Faker, login_customer: LoginCustomer
+):
+    """
+    The whole journey, creating a new customer and account through the UI before depositing and withdrawing.
+    """
     first_name = faker.first_name()
     last_name = faker.last_name()
     currency = Currency.POUND
@@ -45,21 +125,22 @@ def test_deposit_withdraw_customer(
     # Check we can login with the newly created customer and see their account summary
     login_customer.navigate()
     details_page = login_customer.login(label=f"{first_name} {last_name}")
-    details_page.expect_account_details(balance=0, currency=currency)
+    _deposit_withdraw(details_page, currency)
 
-    # Check we can deposit money and see the updated account summary
-    details_page.deposit(amount=100)
-    details_page.expect_account_details(balance=100, currency=currency)
-    details_page.expect_message(CustomerMessages.DEPOSIT_SUCCESSFUL)
-    details_page.go_to_transactions(expected_count=2)
-    details_page.expect_transaction_row_contains(balance=100, transaction_type="Credit")
-    details_page.back_to_account_summary()
 
-    # Check we can withdraw money and see the updated account summary
-    details_page.withdraw(amount=50)
-    details_page.expect_account_details(balance=50, currency=currency)
-    details_page.expect_message(CustomerMessages.WITHDRAWAL_SUCCESSFUL)
-    details_page.go_to_transactions(expected_count=3)
-    details_page.expect_transaction_row_contains(balance=50, transaction_type="Debit")
-    details_page.back_to_account_summary()
-    details_page.expect_account_details(balance=50, currency=currency)
+@pytest.mark.soak
+def test_soak_deposit_withdraw_customer(
+    login_manager: LoginManager,
+    faker: Faker,
+    login_customer: LoginCustomer,
+    soak: SoakRecorder,
+    pytestconfig,
+):
+    """
+    Repeats the deposit and withdraw journey on the same browser (see `--soak-iterations` and `--soak-hours`),
+    as the application slows down the more customers and transactions pile up in its localStorage.
+    """
+    while soak.keep_going():
+        with soak.iteration():
+            _deposit_withdraw_new_customer(login_manager, faker, login_customer)
+    assert soak.error_rate() <= pytestconfig.getoption("soak_max_error_rate")
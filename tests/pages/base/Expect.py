@@ -0,0 +1,98 @@
+import dis
+import functools
+import sys
+import time
+from types import CodeType, FrameType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from playwright.sync_api import Page
+from playwright.sync_api import expect as playwright_expect
+
+
+class ExpectTimeouts:
+    """
+    Keeps, per `expect` call site, the timeout to use (when one was learned from previous runs),
+    and how long each assertion actually waited in this run.
+    """
+
+    def __init__(self):
+        self.learned: Dict[str, float] = {}
+        self.observed: List[Tuple[str, float, bool]] = []
+
+
+# Shared by all page objects, and filled in by tooling/AdaptiveTimeouts.py
+TIMEOUTS = ExpectTimeouts()
+
+
+class _TimedAssertions:
+    """
+    Wraps Playwright assertions, timing each one and using the learned timeout of its call site (if any).
+    """
+
+    def __init__(self, assertions, site: str):
+        self._assertions = assertions
+        self._site = site
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._assertions, name)
+        if not callable(attribute) or not name.startswith(("to_", "not_to_")):
+            return attribute
+        return self._timed(attribute, f"{self._site}:{name}")
+
+    def _timed(self, assertion: Callable, key: str) -> Callable:
+        def timed(*args, **kwargs):
+            if "timeout" not in kwargs and key in TIMEOUTS.learned:
+                kwargs["timeout"] = TIMEOUTS.learned[key]
+            started = time.perf_counter()
+            try:
+                result = assertion(*args, **kwargs)
+            except AssertionError:
+                TIMEOUTS.observed.append(
+                    (key, (time.perf_counter() - started) * 1000, False)
+                )
+                raise
+            TIMEOUTS.observed.append(
+                (key, (time.perf_counter() - started) * 1000, True)
+            )
+            return result
+
+        return timed
+
+
+@functools.lru_cache(maxsize=None)
+def _expect_offsets(code: CodeType) -> Tuple[int, ...]:
+    """The offsets of the instructions loading `expect` in a function, in order."""
+    return tuple(
+        instruction.offset
+        for instruction in dis.get_instructions(code)
+        if instruction.opname in ("LOAD_GLOBAL", "LOAD_NAME")
+        and instruction.argval == "expect"
+    )
+
+
+def _site(caller: FrameType) -> str:
+    """
+    Names the `expect` call a frame is making by its function and its ordinal within it
+    (e.g. `AddCustomer._expect_new_customer_form_empty#2`), which line numbers elsewhere in the file don't change.
+    """
+    ordinal = sum(offset <= caller.f_lasti for offset in _expect_offsets(caller.f_code))
+    return f"{caller.f_code.co_qualname}#{ordinal}"
+
+
+def _browser_name(actual) -> str:
+    """The browser an assertion runs on, as each browser waits for its own time."""
+    page = actual if isinstance(actual, Page) else getattr(actual, "page", None)
+    browser = page.context.browser if page is not None else None
+    return browser.browser_type.name if browser is not None else "unknown"
+
+
+def expect(actual, message: Optional[str] = None):
+    """
+    Drop-in replacement for Playwright's `expect`, to be used by page objects.
+
+    Each assertion is keyed by the browser and its call site (e.g.
+    `chromium:AddCustomer._expect_new_customer_form_empty#1:to_be_empty`), so that how long it waits
+    can be recorded and, later on, its timeout learned.
+    """
+    site = f"{_browser_name(actual)}:{_site(sys._getframe(1))}"
+    return _TimedAssertions(playwright_expect(actual, message), site)
@@ -1,6 +1,8 @@
-from playwright.sync_api import Locator, Page, expect
+from playwright.sync_api import Locator, Page
 
+from .Expect import expect
 from .Reporter import Reporter
+from .Step import step
 
 
 class Login:
@@ -15,6 +17,7 @@ class Login:
             "button", name="Customer Login"
         )
 
+    @step
     def navigate(self):
         self.reporter.log("Navigating to BASE_URL/login")
         self.page.goto("#/login")
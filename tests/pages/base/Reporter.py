@@ -1,9 +1,19 @@
 import logging
+import time
 from base64 import b64encode
-from typing import List
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Protocol
 
 import pytest_html
-from playwright.sync_api import Page
+from playwright.sync_api import Locator, Page
+
+
+class StepListener(Protocol):
+    """Anything that wants to know when page object steps start and finish (e.g. to profile them)."""
+
+    def step_started(self, name: str): ...
+
+    def step_finished(self, name: str, duration: float, failed: bool): ...
 
 
 class Reporter:
@@ -12,15 +22,118 @@ class Reporter:
         self.page = page
         self.logger = logger
         self.extras = extras
+        self.started_at = time.perf_counter()
+        self.retries: List[Dict] = []
+        self.steps: List[str] = []
+        # Per running step, the time spent on our own bookkeeping, left out of its duration (see `overhead`)
+        self.step_overheads: List[float] = []
+        self.step_listeners: List[StepListener] = []
+        # Long runs (e.g. soak tests) can turn screenshots off, so they don't pile up in the report
+        self.snapshots = True
+        # Set by the `reporter` fixture when snapshots are compared with golden images (see tooling/Visual.py)
+        self.visual = None
+        # How many snapshots each step took, to name them (see `snapshot`)
+        self.snapshot_counts: Dict[str, int] = {}
 
     def log(self, message):
         self.logger.info(message)
 
-    def log_with_snapshot(self, message):
+    def log_with_snapshot(
+        self,
+        message,
+        name: Optional[str] = None,
+        mask: Optional[List[Locator]] = None,
+    ):
         self.log(message)
-        self.snapshot()
+        self.snapshot(name=name, mask=mask)
+
+    def snapshot(
+        self, name: Optional[str] = None, mask: Optional[List[Locator]] = None
+    ):
+        """
+        Takes a screenshot for the report and, when visual checks are on, compares it with its golden image.
 
-    def snapshot(self):
-        img_bytes = self.page.screenshot()
+        Args:
+            name (Optional[str], optional): The name of the snapshot, unique within the test. Defaults to the
+            current step and how many snapshots it took (e.g. `DetailsCustomers.deposit-1`).
+            mask (Optional[List[Locator]], optional): Dynamic areas (e.g. generated names) to paint over, only when
+            visual checks are on (the report keeps them visible for debugging otherwise). Defaults to None.
+        """
+        if not self.snapshots:
+            return
+        if self.visual is None:
+            mask = None
+        img_bytes = self.page.screenshot(mask=mask or [])
         img_b64 = b64encode(img_bytes).decode("ascii")
         self.extras.append(pytest_html.extras.png(img_b64))
+        if self.visual is not None:
+            if name is None:
+                step = self.steps[-1] if self.steps else "test"
+                self.snapshot_counts[step] = self.snapshot_counts.get(step, 0) + 1
+                name = f"{step}-{self.snapshot_counts[step]}"
+            self.visual.check(name, img_bytes)
+
+    @contextmanager
+    def step(self, name: str):
+        """
+        Keeps track of the page object step running (steps can be nested), letting step listeners know about it.
+
+        The duration listeners get only covers the step itself: our own overhead (checkpoints, restoring them,
+        and the listeners of nested steps) is left out.
+
+        Args:
+            name (str): The name of the step, such as `DetailsCustomers.deposit`.
+        """
+        with self.overhead():
+            for listener in self.step_listeners:
+                listener.step_started(name)
+        self.steps.append(name)
+        self.step_overheads.append(0.0)
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.steps.pop()
+            duration = time.perf_counter() - started - self.step_overheads.pop()
+            with self.overhead():
+                for listener in self.step_listeners:
+                    listener.step_finished(name, duration, failed)
+
+    @contextmanager
+    def overhead(self):
+        """Leaves the time spent in the block out of the duration of all the steps running."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.step_overheads = [
+                overhead + elapsed for overhead in self.step_overheads
+            ]
+
+    def log_retry(
+        self,
+        step: str,
+        attempt: int,
+        retries: int,
+        exception: Exception,
+        saved: float = 0.0,
+    ):
+        """
+        Logs (and keeps, for the final report) that a step is about to be retried, usually from its checkpoint.
+
+        Args:
+            step (str): The name of the step being retried.
+            attempt (int): The attempt that just failed.
+            retries (int): How many retries the step is allowed.
+            exception (Exception): The transient error that made the attempt fail.
+            saved (float, optional): The time (in seconds) we would have spent replaying the test up to this step.
+            Defaults to 0.0 (for retries done by the step itself).
+        """
+        self.retries.append({"step": step, "attempt": attempt, "saved": saved})
+        self.log(
+            f"Retrying {step} ({attempt}/{retries}), "
+            f"saving {saved:.1f}s of replay, after: {str(exception).splitlines()[0]}"
+        )
@@ -0,0 +1,128 @@
+import functools
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+from playwright.sync_api import Error, Page, TimeoutError
+
+# Each step is tried up to 3 times: the first attempt plus these retries
+STEP_RETRIES = 2
+
+# The application keeps all its data (customers, accounts, transactions) in the localStorage
+RESTORE_LOCAL_STORAGE = """
+(items) => {
+    localStorage.clear();
+    for (const { name, value } of items) localStorage.setItem(name, value);
+}
+"""
+
+
+# The Playwright calls whose timeouts are worth retrying: they wait for the network, not for an element
+NAVIGATIONS = ("goto", "reload", "wait_for_url", "wait_for_load_state")
+
+
+def is_transient(exception: Error) -> bool:
+    """
+    Tells if a failure is worth retrying: navigation timeouts (e.g. on `page.goto`) and network errors are,
+    since the application is hosted somewhere else. Failed expectations and timeouts waiting for an element
+    (e.g. clicking a button that is not there) are not, so that real regressions fail fast.
+    """
+    if "net::ERR_" in exception.message:
+        return True
+    # Messages start with the call that failed, e.g. "Page.goto: Timeout 30000ms exceeded."
+    call = exception.message.split(":", 1)[0]
+    return isinstance(exception, TimeoutError) and call.endswith(
+        tuple(f".{navigation}" for navigation in NAVIGATIONS)
+    )
+
+
+class Checkpoint:
+    """
+    The state of the browser at the beginning of a step (the current route and storage state),
+    so that a step can be retried without replaying all the steps that came before it.
+    """
+
+    def __init__(self, page: Page):
+        self.url = page.url
+        self.storage_state = page.context.storage_state()
+        self.started_at = time.perf_counter()
+
+    def restore(self, page: Page):
+        """
+        Brings the browser back to this checkpoint: cookies, localStorage, and route.
+        """
+        page.context.clear_cookies()
+        if self.storage_state["cookies"]:
+            page.context.add_cookies(self.storage_state["cookies"])
+        page.goto(self.url)
+        if self.url == "about:blank":
+            return
+        url = urlsplit(self.url)
+        origin = f"{url.scheme}://{url.netloc}"
+        local_storage = next(
+            (
+                entry["localStorage"]
+                for entry in self.storage_state["origins"]
+                if entry["origin"] == origin
+            ),
+            [],
+        )
+        page.evaluate(RESTORE_LOCAL_STORAGE, local_storage)
+        # The application only reads the localStorage when it starts
+        page.reload()
+
+
+def step(method: Callable = None, *, retries: int = STEP_RETRIES) -> Callable:
+    """
+    Decorator marking a page object method as a step, whose beginning is a checkpoint.
+
+    If the step fails with a transient error, the browser is brought back to the checkpoint and only
+    that step is retried (instead of the whole test). When steps are nested, the innermost one is retried,
+    and outer steps do not retry the same failure again.
+
+    The Reporter is told when the step starts and finishes (see `Reporter.step`), as well as about retries
+    (and the time they saved us, compared to replaying the test up to that step). Taking and restoring
+    checkpoints is not part of the duration of the step.
+
+    Args:
+        method (Callable): The page object method, which must have `page` and `reporter` attributes.
+        retries (int, optional): How many times to retry the step. Defaults to STEP_RETRIES.
+    """
+    if method is None:
+        return functools.partial(step, retries=retries)
+
+    @functools.wraps(method)
+    def wrapper(page_object, *args, **kwargs):
+        page: Page = page_object.page
+        name = method.__qualname__
+        with page_object.reporter.step(name):
+            with page_object.reporter.overhead():
+                checkpoint = Checkpoint(page)
+            snapshot_counts = dict(page_object.reporter.snapshot_counts)
+            attempt = 1
+            while True:
+                try:
+                    if attempt > 1:
+                        with page_object.reporter.overhead():
+                            checkpoint.restore(page)
+                        # snapshots of a retry are named as the ones of the first attempt
+                        page_object.reporter.snapshot_counts = dict(snapshot_counts)
+                    return method(page_object, *args, **kwargs)
+                except Error as exception:
+                    if (
+                        attempt > retries
+                        or not is_transient(exception)
+                        or getattr(exception, "retried", False)
+                    ):
+                        exception.retried = True
+                        raise
+                    page_object.reporter.log_retry(
+                        step=name,
+                        attempt=attempt,
+                        retries=retries,
+                        exception=exception,
+                        saved=checkpoint.started_at - page_object.reporter.started_at,
+                    )
+                    attempt += 1
+
+    return wrapper
@@ -2,8 +2,10 @@ from enum import Enum
 from typing import Literal
 
 from pages.base.Currency import Currency
+from pages.base.Expect import expect
 from pages.base.Reporter import Reporter
-from playwright.sync_api import Locator, Page, expect
+from pages.base.Step import step
+from playwright.sync_api import Locator, Page
 
 
 class CustomerMessages(Enum):
@@ -37,20 +39,42 @@ class DetailsCustomers:
         self.submit_button: Locator = self.page.get_by_role("form").get_by_role(
             "button"
         )
-
+        # Generated data (unless seeded, see `faker_seed`) and transaction dates, different on each run
+        self.dynamic_areas = [
+            self.page.locator(".fontBig"),
+            self.account_select,
+            self.page.locator("tbody td:first-child"),
+        ]
+
+    @step
     def logout(self):
         """
         Logs out the customer by clicking the logout button
         """
-        self.reporter.log_with_snapshot("Logging out the customer")
+        self.reporter.log_with_snapshot(
+            "Logging out the customer", mask=self.dynamic_areas
+        )
         self.logout_button.click()
 
+    @step
+    def select_account(self, index: int):
+        """
+        Selects which of the customer's accounts to see (and make transactions on).
+
+        Args:
+            index (int): The index of the account, in the order they were opened.
+        """
+        self.reporter.log(f"Selecting the account with index {index}")
+        self.account_select.select_option(index=index)
+
+    @step
     def expect_account_details(self, balance: int, currency: Currency):
         """
         Expects the message indicating that the customer has no account to be visible.
         """
         self.reporter.log_with_snapshot(
-            f"Expect customer sees his account balance and currency as {balance} and {currency}"
+            f"Expect customer sees his account balance and currency as {balance} and {currency}",
+            mask=self.dynamic_areas,
         )
         expect(
             self.page.get_by_text(f"Balance : {balance} , Currency : {currency.value}")
@@ -67,7 +91,9 @@ class DetailsCustomers:
             transaction_type (Literal["Deposit", "Withdrawl"]): The button to click to decide on which transaction to perform
             (yes, there's a typo in the application, a minor BUG to report)
         """
-        self.reporter.log_with_snapshot(f"{transaction_type} {amount} on the account")
+        self.reporter.log_with_snapshot(
+            f"{transaction_type} {amount} on the account", mask=self.dynamic_areas
+        )
         self.transaction_type_button: Locator = self.page.get_by_role(
             "button", name=transaction_type
         )
@@ -75,6 +101,7 @@ class DetailsCustomers:
         self.amount_input.fill(str(amount))
         self.submit_button.click()
 
+    @step
     def withdraw(self, amount: int):
         """
         Withdraws money from the account.
@@ -84,6 +111,7 @@ class DetailsCustomers:
         """
         self._perform_transaction(amount=amount, transaction_type="Withdrawl")
 
+    @step
     def deposit(self, amount: int):
         """
         Deposits money on the account.
@@ -93,11 +121,13 @@ class DetailsCustomers:
         """
         self._perform_transaction(amount=amount, transaction_type="Deposit")
 
+    @step
     def go_to_transactions(self, expected_count: int = 1, max_count=5):
         """
         Goes to the transactions page by clicking the transactions button.
 
-        BUG: This page is often not showing the rows at all, so we retry some times until we see the amount of rows we expect there.
+        BUG: This page is often not showing the rows at all, so we retry some times until we see the amount of rows we expect there
+        (letting the reporter know about each retry, so they show up in the report).
 
         **WARNING:** Assumes we are on the account summary page before calling it.
 
@@ -109,7 +139,10 @@ class DetailsCustomers:
         last_exception = None
         while count <= max_count:
             self.reporter.log_with_snapshot(
-                f"Going to the transactions page to see {expected_count} rows (try {count}/{max_count})"
+                f"Going to the transactions page to see {expected_count} rows (try {count}/{max_count})",
+                # the same for every try, so how many tries it takes doesn't shift snapshot names
+                name=f"go_to_transactions-{expected_count}",
+                mask=self.dynamic_areas,
             )
             self.transaction_button.click()
             expect(self.back_button).to_be_visible()
@@ -119,11 +152,19 @@ class DetailsCustomers:
                 break
             except AssertionError as exception:
                 last_exception = exception
+                if count < max_count:
+                    self.reporter.log_retry(
+                        step=self.reporter.steps[-1],
+                        attempt=count,
+                        retries=max_count - 1,
+                        exception=exception,
+                    )
                 count += 1
                 self.back_button.click()
         if count > max_count:
             raise last_exception
 
+    @step
     def expect_transaction_row_contains(
         self, balance: int, transaction_type: Literal["Credit", "Debit"]
     ):
@@ -135,7 +176,8 @@ class DetailsCustomers:
             transaction_type (Literal["Credit", "Debit"]): The transaction type to expect in the transaction row.
         """
         self.reporter.log_with_snapshot(
-            f"Expect a row in the transactions table with the following details: balance: {balance}, transaction type: {transaction_type}"
+            f"Expect a row in the transactions table with the following details: balance: {balance}, transaction type: {transaction_type}",
+            mask=self.dynamic_areas,
         )
         expect(
             self.page.get_by_role("row").filter(
@@ -143,18 +185,24 @@ class DetailsCustomers:
             )
         ).to_be_visible()
 
+    @step
     def back_to_account_summary(self):
         """
         Goes back to the account summary page by clicking the transactions button and then going back.
 
         **WARNING:** Assumes we are on the transactions page before calling it.
         """
-        self.reporter.log_with_snapshot("Going back to the account summary page")
+        self.reporter.log_with_snapshot(
+            "Going back to the account summary page", mask=self.dynamic_areas
+        )
         self.back_button.click()
 
+    @step
     def expect_message(self, message: CustomerMessages):
         """
         Expects a message indicating some operation happened (like a successful deposit or an error when trying to withdraw money) to be visible.
         """
-        self.reporter.log_with_snapshot(f"Expect a message indicating: {message.value}")
+        self.reporter.log_with_snapshot(
+            f"Expect a message indicating: {message.value}", mask=self.dynamic_areas
+        )
         expect(self.page.get_by_text(message.value)).to_be_visible()
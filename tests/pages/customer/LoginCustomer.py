@@ -1,8 +1,10 @@
 from typing import List, Optional
 
+from pages.base.Expect import expect
 from pages.base.Login import Login
 from pages.base.Reporter import Reporter
-from playwright.sync_api import Locator, Page, expect
+from pages.base.Step import step
+from playwright.sync_api import Locator, Page
 
 from .DetailsCustomer import DetailsCustomers
 
@@ -14,14 +16,19 @@ class LoginCustomer(Login):
         super().__init__(page, reporter)
         self.customer_select: Locator = self.page.locator("#userSelect")
         self.login_button: Locator = self.page.get_by_role("button", name="Login")
+        # Generated data, different on each run (unless seeded, see `faker_seed`)
+        self.dynamic_areas = [self.customer_select]
 
+    @step
     def navigate_login_customer(self):
         """
         Navigates to the login page for customers.
 
         **WARNING:** Assumes .navigate() was called before it
         """
-        self.reporter.log_with_snapshot("Performing login as customer")
+        self.reporter.log_with_snapshot(
+            "Performing login as customer", mask=self.dynamic_areas
+        )
         self.customer_button.click()
         expect(self.customer_select).to_be_visible()
 
@@ -38,7 +45,8 @@ class LoginCustomer(Login):
             str: The label of the selected customer.
         """
         self.reporter.log_with_snapshot(
-            f"Selecting customer with label: {label} and index: {index}"
+            f"Selecting customer with label: {label} and index: {index}",
+            mask=self.dynamic_areas,
         )
         check_label = label
         if label is not None and index is None:
@@ -61,6 +69,7 @@ class LoginCustomer(Login):
         self.reporter.log(f"Check if {check_label} is visible after login")
         expect(self.page.get_by_text(f"Welcome {check_label} !!")).to_be_visible()
 
+    @step
     def get_available_customers_to_login(self) -> List[str]:
         """
         Retrieves the list of available customers to login - useful to check when we add/delete customers.
@@ -73,6 +82,7 @@ class LoginCustomer(Login):
         expect(self.customer_select).to_be_visible()
         return self.customer_select.all_inner_texts()[0].split("\n")[1:]
 
+    @step
     def login(
         self, label: Optional[str] = None, index: Optional[int] = None
     ) -> DetailsCustomers:
@@ -1,5 +1,7 @@
+from pages.base.Expect import expect
 from pages.base.Reporter import Reporter
-from playwright.sync_api import Locator, Page, expect
+from pages.base.Step import step
+from playwright.sync_api import Locator, Page
 
 
 class AddCustomer:
@@ -17,14 +19,23 @@ class AddCustomer:
         self.submit_button: Locator = page.get_by_role("form").get_by_role(
             "button", name="Add Customer"
         )
+        # Generated data, different on each run (unless seeded, see `faker_seed`)
+        self.dynamic_areas = [
+            self.first_name_input,
+            self.last_name_input,
+            self.post_code_input,
+        ]
 
+    @step
     def navigate(self):
         """
         Navigates to the login manager page to add a new customer.
 
         **WARNING:** Assumes we are already logged in as a manager.
         """
-        self.reporter.log_with_snapshot("Navigating as a manager to add a new customer")
+        self.reporter.log_with_snapshot(
+            "Navigating as a manager to add a new customer", mask=self.dynamic_areas
+        )
         self.new_customer_button.click()
         self._expect_new_customer_form_empty()
 
@@ -47,7 +58,8 @@ class AddCustomer:
         """
         self.reporter.log_with_snapshot(
             f"Filling in the new customer form with the following details:  "
-            f"First Name: {first_name}, Last Name: {last_name}, Post Code: {post_code}"
+            f"First Name: {first_name}, Last Name: {last_name}, Post Code: {post_code}",
+            mask=self.dynamic_areas,
         )
         self.first_name_input.fill(first_name)
         self.last_name_input.fill(last_name)
@@ -60,10 +72,13 @@ class AddCustomer:
         **WARNING**: supposedly a alert/popup/dialog should appear after the new_customer_submit.click(),
         but somehow playwright just ignores it? It works, for now...
         """
-        self.reporter.log_with_snapshot("Submitting customer details")
+        self.reporter.log_with_snapshot(
+            "Submitting customer details", mask=self.dynamic_areas
+        )
         self.submit_button.click()
         self._expect_new_customer_form_empty()
 
+    @step
     def add_customer(self, first_name, last_name, post_code):
         """
         Adds a new customer with the provided details.
@@ -79,7 +94,8 @@ class AddCustomer:
         """
         self.reporter.log_with_snapshot(
             "Adding a new customer with the following details:  "
-            f"First Name: {first_name}, Last Name: {last_name}, Post Code: {post_code}"
+            f"First Name: {first_name}, Last Name: {last_name}, Post Code: {post_code}",
+            mask=self.dynamic_areas,
         )
         self._fill_in_customer_detail(first_name, last_name, post_code)
         self._submit_customer_details()
@@ -1,5 +1,7 @@
+from pages.base.Expect import expect
 from pages.base.Reporter import Reporter
-from playwright.sync_api import Locator, Page, expect
+from pages.base.Step import step
+from playwright.sync_api import Locator, Page
 
 
 class ListCustomers:
@@ -13,7 +15,10 @@ class ListCustomers:
         )
         self.search_input: Locator = page.get_by_role("textbox", name="Search Customer")
         self.rows: Locator = self.page.get_by_role("row")
+        # Generated data, different on each run (unless seeded, see `faker_seed`)
+        self.dynamic_areas = [self.search_input]
 
+    @step
     def navigate(self):
         """
         Navigates to the login manager page to add a new customer.
@@ -21,11 +26,12 @@ class ListCustomers:
         **WARNING:** Assumes we are already logged in as a manager.
         """
         self.reporter.log_with_snapshot(
-            "Navigating as a manager to list customer's data"
+            "Navigating as a manager to list customer's data", mask=self.dynamic_areas
         )
         self.customer_list_button.click()
         expect(self.search_input).to_be_visible()
 
+    @step
     def search(self, text: str):
         """
         Search for a customer's information (either their first name, their last name, or their postcode)
@@ -36,11 +42,13 @@ class ListCustomers:
             text (str): The customer's information to search for.
         """
         self.reporter.log_with_snapshot(
-            f"Searching for a customer with the following details: {text}"
+            f"Searching for a customer with the following details: {text}",
+            mask=self.dynamic_areas,
         )
         self.search_input.clear()
         self.search_input.fill(text)
 
+    @step
     def expect_row_data(self, first_name: str, last_name: str, post_code: str):
         """
         Expects a row with the customer's data to be visible.
@@ -53,12 +61,14 @@ class ListCustomers:
             post_code (str): The customer's post code.
         """
         self.reporter.log_with_snapshot(
-            f"Expecting to see a row with the following data: {first_name}, {last_name}, {post_code}"
+            f"Expecting to see a row with the following data: {first_name}, {last_name}, {post_code}",
+            mask=self.dynamic_areas,
         )
         expect(self.rows.get_by_role("cell", name=first_name)).to_be_visible()
         expect(self.rows.get_by_role("cell", name=last_name)).to_be_visible()
         expect(self.rows.get_by_role("cell", name=post_code)).to_be_visible()
 
+    @step
     def delete_row_index(self, index: int):
         """
         Deletes a row with the customer's data by clicking the delete button in the row.
@@ -67,7 +77,8 @@ class ListCustomers:
             index (int): The index of the row to delete, starting from 0.
         """
         self.reporter.log_with_snapshot(
-            f"Deleting the row with index {index} in the list of customers"
+            f"Deleting the row with index {index} in the list of customers",
+            mask=self.dynamic_areas,
         )
         # Avoid first row, which has the headers
         self.rows.nth(index + 1).get_by_role("button").click()
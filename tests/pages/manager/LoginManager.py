@@ -1,5 +1,6 @@
 from pages.base.Login import Login
 from pages.base.Reporter import Reporter
+from pages.base.Step import step
 from playwright.sync_api import Page
 
 from .AddCustomer import AddCustomer
@@ -11,11 +12,13 @@ class LoginManager(Login):
     def __init__(self, page: Page, reporter: Reporter):
         super().__init__(page, reporter)
 
+    @step
     def navigate(self):
         """Navigates to the login page for managers."""
         super().navigate()
         self.manager_button.click()
 
+    @step
     def navigate_to_add_customer(self) -> AddCustomer:
         """
         Navigates to add a new customer
@@ -27,6 +30,7 @@ class LoginManager(Login):
         new_customer.navigate()
         return new_customer
 
+    @step
     def navigate_to_open_account(self) -> OpenAccount:
         """
         Navigates to open a new account for a customer.
@@ -39,6 +43,7 @@ class LoginManager(Login):
         open_account.navigate()
         return open_account
 
+    @step
     def navigate_to_list_customers(self) -> ListCustomers:
         """
         Navigates to list customer's data (and maybe delete them).
@@ -1,6 +1,8 @@
 from pages.base.Currency import Currency
+from pages.base.Expect import expect
 from pages.base.Reporter import Reporter
-from playwright.sync_api import Locator, Page, expect
+from pages.base.Step import step
+from playwright.sync_api import Locator, Page
 
 
 class OpenAccount:
@@ -15,14 +17,19 @@ class OpenAccount:
         self.customer_select: Locator = self.page.locator("#userSelect")
         self.currency_select: Locator = self.page.locator("#currency")
         self.process_button: Locator = self.page.get_by_role("button", name="Process")
+        # Generated data, different on each run (unless seeded, see `faker_seed`)
+        self.dynamic_areas = [self.customer_select]
 
+    @step
     def navigate(self):
         """
         Navigates to the login manager page to add a new customer.
 
         **WARNING:** Assumes we are already logged in as a manager.
         """
-        self.reporter.log_with_snapshot("Navigating as a manager to add a new customer")
+        self.reporter.log_with_snapshot(
+            "Navigating as a manager to add a new customer", mask=self.dynamic_areas
+        )
         self.open_account_button.click()
         self._expect_new_account_default_values()
 
@@ -34,6 +41,7 @@ class OpenAccount:
         expect(self.currency_select).to_have_value("")
         expect(self.process_button).to_be_visible()
 
+    @step
     def open_account(self, customer_full_name: str, currency: Currency):
         """
         Open a new account for a customer with full name and currency as specified as inputs.
@@ -48,7 +56,8 @@ class OpenAccount:
         """
         self.reporter.log_with_snapshot(
             "Adding a new customer with the following details:  "
-            f"Full Name: {customer_full_name}, Currency: {currency}"
+            f"Full Name: {customer_full_name}, Currency: {currency}",
+            mask=self.dynamic_areas,
         )
         self.customer_select.select_option(label=customer_full_name)
         self.currency_select.select_option(label=currency.value)
@@ -0,0 +1,88 @@
+from html import escape
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from pages.base.Expect import TIMEOUTS
+
+from .History import History
+from .Stats import percentile
+
+# Learned timeouts are never shorter or longer than these (in milliseconds)
+MIN_TIMEOUT = 250
+MAX_TIMEOUT = 10_000
+
+# How many passing waits a call site needs before we trust what we learned about it
+MIN_SAMPLES = 10
+
+
+def learn_timeouts(
+    waits: Dict[str, List[float]],
+    safety_factor: float,
+    min_samples: int = MIN_SAMPLES,
+) -> Dict[str, float]:
+    """
+    Derives a timeout per `expect` call site: the p99 of how long it waited times a safety factor.
+
+    Args:
+        waits (Dict[str, List[float]]): The waits (in milliseconds) of passing assertions per call site.
+        safety_factor (float): How much slack to give on top of the p99.
+        min_samples (int, optional): Call sites with fewer waits keep the fixed timeout. Defaults to MIN_SAMPLES.
+
+    Returns:
+        Dict[str, float]: The timeout (in milliseconds) per call site.
+    """
+    return {
+        site: min(max(percentile(values, 99) * safety_factor, MIN_TIMEOUT), MAX_TIMEOUT)
+        for site, values in waits.items()
+        if len(values) >= min_samples
+    }
+
+
+class AdaptiveTimeoutsPlugin:
+    """
+    Pytest plugin recording how long every `expect` in our page objects waits (keyed by call site),
+    and, when `--expect-timeouts=learned`, using what previous runs recorded to set per-assertion timeouts.
+    """
+
+    def __init__(self, config: pytest.Config, run_id: str):
+        self.config = config
+        self.run_id = run_id
+        self.history = History(Path(config.getoption("history_db")))
+        self.waits = self.history.waits()
+        if config.getoption("expect_timeouts") == "learned":
+            TIMEOUTS.learned = learn_timeouts(
+                self.waits, config.getoption("expect_safety_factor")
+            )
+
+    def pytest_report_header(self, config: pytest.Config):
+        if config.getoption("expect_timeouts") == "learned":
+            return f"expect timeouts: learned for {len(TIMEOUTS.learned)} call sites"
+        return "expect timeouts: fixed"
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        """Stores how long each assertion waited in this run."""
+        if TIMEOUTS.observed:
+            self.history.record_waits(self.run_id, TIMEOUTS.observed)
+        self.history.close()
+
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        """Adds, per call site, how long assertions waited and the timeout they had."""
+        observed: Dict[str, List[float]] = {}
+        for site, waited, _ in TIMEOUTS.observed:
+            observed.setdefault(site, []).append(waited)
+        if not observed:
+            return
+        timeouts = {
+            site: f"{timeout:.0f}" for site, timeout in TIMEOUTS.learned.items()
+        }
+        rows = "".join(
+            f"<tr><td>{escape(site)}</td><td>{len(values)}</td>"
+            f"<td>{percentile(values, 99):.0f}</td>"
+            f"<td>{timeouts.get(site, 'fixed')}</td></tr>"
+            for site, values in sorted(observed.items())
+        )
+        postfix.append(
+            "<h2>Expect timeouts</h2><table><tr><th>Call site</th><th>Count</th>"
+            f"<th>Waited p99 (ms)</th><th>Timeout (ms)</th></tr>{rows}</table>"
+        )
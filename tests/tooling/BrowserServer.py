@@ -0,0 +1,224 @@
+"""
+Keeps a browser running in the background, so that test runs can connect to it instead of launching one.
+
+Usage (from the root of the project):
+    PYTHONPATH=tests python -m tooling.BrowserServer start [--browser chromium] [--idle 1800]
+    PYTHONPATH=tests python -m tooling.BrowserServer status [--browser chromium]
+    PYTHONPATH=tests python -m tooling.BrowserServer stop [--browser chromium]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from playwright._impl._driver import compute_driver_executable, get_driver_env
+
+STATE_DIR = Path("reports/.browser-server")
+
+# Shut the server down when no test run connected to it for this long (in seconds)
+IDLE_TIMEOUT = 30 * 60
+
+
+def _state_path(browser_name: str) -> Path:
+    return STATE_DIR.joinpath(f"{browser_name}.json")
+
+
+def _read_state(browser_name: str) -> Optional[Dict]:
+    try:
+        return json.loads(_state_path(browser_name).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def warm_endpoint(browser_name: str, touch: bool = True) -> Optional[str]:
+    """
+    Health check for the warm browser server: it must have been started, still be running, and accept connections.
+
+    Args:
+        browser_name (str): The browser the server runs (chromium, firefox or webkit).
+        touch (bool, optional): Count this check as using the server, pushing its idle shutdown further away. Defaults to True.
+
+    Returns:
+        Optional[str]: The websocket endpoint to connect to, or None if there is no healthy server.
+    """
+    state = _read_state(browser_name)
+    if state is None or not _is_alive(state["pid"]):
+        return None
+    url = urlsplit(state["ws_endpoint"])
+    try:
+        with socket.create_connection((url.hostname, url.port), timeout=0.5):
+            pass
+    except OSError:
+        return None
+    if touch:
+        os.utime(_state_path(browser_name))
+    return state["ws_endpoint"]
+
+
+def keep_alive(browser_name: str, interval: float = 60) -> threading.Event:
+    """
+    Keeps the browser server from shutting down while a test run uses it (which can take longer than `--idle`,
+    e.g. soak tests), by counting it as used every `interval` seconds, in a background thread.
+
+    Returns:
+        threading.Event: Set it once done with the server (which counts as a last use).
+    """
+    done = threading.Event()
+
+    def touch():
+        while not done.wait(interval):
+            _state_path(browser_name).touch()
+        _state_path(browser_name).touch()
+
+    threading.Thread(target=touch, daemon=True).start()
+    return done
+
+
+def serve(browser_name: str, idle_timeout: float):
+    """
+    Runs the browser server (Playwright's `launch-server`) and watches over it, until it dies,
+    is stopped, or nobody used it for `idle_timeout` seconds (based on the state file modification time).
+
+    `python -m playwright` only wraps the node driver, which owns the browser, so we run the driver itself
+    (in a process group of its own) and shut down the whole group: driver and browser processes alike.
+    """
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".json", dir=STATE_DIR, delete=False
+    ) as config:
+        json.dump({"headless": True, "host": "127.0.0.1", "port": 0}, config)
+    server = subprocess.Popen(
+        [*compute_driver_executable(), "launch-server"]
+        + ["--browser", browser_name, "--config", config.name],
+        stdout=subprocess.PIPE,
+        text=True,
+        env=get_driver_env(),
+        start_new_session=True,
+    )
+    ws_endpoint = server.stdout.readline().strip()
+    os.unlink(config.name)
+    # Keep draining the output, so the server never blocks writing to it
+    threading.Thread(target=server.stdout.read, daemon=True).start()
+
+    def shutdown(*_):
+        try:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        _state_path(browser_name).unlink(missing_ok=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    if not ws_endpoint:
+        shutdown()
+    _state_path(browser_name).write_text(
+        json.dumps(
+            {
+                "pid": os.getpid(),
+                "browser": browser_name,
+                "ws_endpoint": ws_endpoint,
+                "started_at": time.time(),
+            }
+        )
+    )
+    while server.poll() is None:
+        idle = time.time() - _state_path(browser_name).stat().st_mtime
+        if idle > idle_timeout:
+            shutdown()
+        time.sleep(5)
+    shutdown()
+
+
+def start(browser_name: str, idle_timeout: float, wait: float = 30) -> Optional[str]:
+    """
+    Starts the browser server in the background (unless a healthy one is already running).
+
+    Returns:
+        Optional[str]: The websocket endpoint of the server, or None if it did not come up in `wait` seconds.
+    """
+    ws_endpoint = warm_endpoint(browser_name)
+    if ws_endpoint:
+        return ws_endpoint
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with STATE_DIR.joinpath(f"{browser_name}.log").open("a") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "tooling.BrowserServer", "serve"]
+            + ["--browser", browser_name, "--idle", str(idle_timeout)],
+            stdout=log,
+            stderr=log,
+            stdin=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        ws_endpoint = warm_endpoint(browser_name)
+        if ws_endpoint:
+            return ws_endpoint
+        time.sleep(0.2)
+    return None
+
+
+def stop(browser_name: str) -> bool:
+    """
+    Stops the browser server, if it's running.
+
+    Returns:
+        bool: True if there was a server to stop.
+    """
+    state = _read_state(browser_name)
+    if state is None or not _is_alive(state["pid"]):
+        _state_path(browser_name).unlink(missing_ok=True)
+        return False
+    os.kill(state["pid"], signal.SIGTERM)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["start", "stop", "status", "serve"])
+    parser.add_argument("--browser", default="chromium")
+    parser.add_argument(
+        "--idle",
+        type=float,
+        default=IDLE_TIMEOUT,
+        help="seconds without test runs before shutting down",
+    )
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.browser, args.idle)
+    elif args.command == "start":
+        ws_endpoint = start(args.browser, args.idle)
+        if ws_endpoint is None:
+            sys.exit(f"{args.browser} server did not start, check {STATE_DIR}")
+        print(ws_endpoint)
+    elif args.command == "stop":
+        print("stopped" if stop(args.browser) else "not running")
+    else:
+        print(warm_endpoint(args.browser, touch=False) or "not running")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import logging
+import time
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, Tuple
+
+import pytest
+from faker import Faker
+from pages.base.Currency import Currency
+from pages.base.Reporter import Reporter
+from pages.manager.LoginManager import LoginManager
+from playwright.sync_api import Browser, BrowserContext
+
+# Builders of the datasets tests can ask for (see `dataset`), by name
+DATASETS: Dict[str, Tuple[Callable, str]] = {}
+
+
+def dataset(name: str, scope: str = "module") -> Callable:
+    """
+    Decorator registering a dataset builder, which creates data through the application (as a manager)
+    and returns what tests need to know about it (such as the name of a customer).
+
+    Args:
+        name (str): The name tests use to ask for it, with `@pytest.mark.dataset(name)`.
+        scope (str, optional): Whether it's built once per test "module" or once per "session". Defaults to "module".
+    """
+    if scope not in ("module", "session"):
+        raise ValueError(f"Unknown dataset scope: {scope}")
+
+    def register(builder: Callable) -> Callable:
+        DATASETS[name] = (builder, scope)
+        return builder
+
+    return register
+
+
+@dataset("customer_with_accounts")
+def customer_with_accounts(login_manager: LoginManager, faker: Faker) -> Dict:
+    """A customer with an (empty) account in every currency, opened in the order of `currencies`."""
+    first_name = faker.first_name()
+    last_name = faker.last_name()
+    full_name = f"{first_name} {last_name}"
+    add_customer_page = login_manager.navigate_to_add_customer()
+    add_customer_page.add_customer(
+        first_name=first_name, last_name=last_name, post_code=faker.postcode()
+    )
+    open_account_page = login_manager.navigate_to_open_account()
+    for currency in Currency:
+        open_account_page.open_account(customer_full_name=full_name, currency=currency)
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "full_name": full_name,
+        "currencies": list(Currency),
+    }
+
+
+class DatasetsPlugin:
+    """
+    Pytest plugin building the datasets tests ask for (with `@pytest.mark.dataset(name)`) once per module or session,
+    so that setup work grows with the number of datasets, not with the number of tests using them.
+
+    The application keeps all its data in the localStorage, so a dataset is the storage state of the browser
+    once it's built. Each test gets its own copy of it, as the `context` fixture seeds a new context with it:
+    tests can change their data as they please (copy on write, by the browser), without affecting other tests.
+    """
+
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.built: Dict[Tuple[str, str], Dict] = {}
+        self.uses: Dict[Tuple[str, str], int] = {}
+        self.build_time = 0.0
+
+    def _key(self, name: str, item: pytest.Item) -> Tuple[str, str]:
+        if name not in DATASETS:
+            raise pytest.UsageError(f"Unknown dataset: {name}")
+        scope = DATASETS[name][1]
+        return name, item.nodeid.split("::")[0] if scope == "module" else "session"
+
+    def _seed(self, key: Tuple[str, str]):
+        """Different data on each run, except for visual checks (as the `faker_seed` fixture)."""
+        if self.config.option.visual or self.config.option.visual_update:
+            return zlib.crc32("/".join(key).encode())
+        return datetime.now().timestamp()
+
+    def get(
+        self, name: str, item: pytest.Item, browser: Browser, base_url: str
+    ) -> Dict:
+        """
+        Gets a dataset for a test, building it (in a context of its own) the first time its module or session needs it.
+
+        Returns:
+            Dict: The `storage_state` to seed the test context with, and the `data` the builder returned.
+        """
+        key = self._key(name, item)
+        if key not in self.built:
+            started = time.perf_counter()
+            context: BrowserContext = browser.new_context(base_url=base_url)
+            try:
+                page = context.new_page()
+                reporter = Reporter(page, logging.getLogger("MainLogger"), [])
+                reporter.snapshots = False
+                reporter.log(f"Building dataset {name} for {key[1]}")
+                faker = Faker()
+                faker.seed_instance(self._seed(key))
+                data = DATASETS[name][0](LoginManager(page, reporter), faker)
+                self.built[key] = {
+                    "storage_state": context.storage_state(),
+                    "data": data,
+                }
+            finally:
+                context.close()
+            self.build_time += time.perf_counter() - started
+        self.uses[key] = self.uses.get(key, 0) + 1
+        return self.built[key]
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.built:
+            terminalreporter.write_line(
+                f"datasets: built {len(self.built)} in {self.build_time:.1f}s, "
+                f"used by {sum(self.uses.values())} tests"
+            )
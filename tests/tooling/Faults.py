@@ -0,0 +1,85 @@
+import random
+import time
+from typing import List
+
+import pytest
+from playwright.sync_api import BrowserContext, Error, Route
+
+# What the application loads (and waits for) besides its own data: scripts, angular templates and fonts
+DEFAULT_PATTERNS = ["**/*.js", "**/*.html", "**/*.{woff,woff2,ttf}"]
+
+
+class FaultInjector:
+    """
+    Routes the requests of a browser context matching some patterns, to make them slower or fail:
+    a fixed latency plus some random jitter, a bandwidth cap, and a share of error responses.
+
+    Used by the `context` fixture (see the `--inject-*` options) to find out how much slack our timeouts
+    and retries really leave, see tooling/LatencySweep.py.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        kbps: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+    ):
+        """
+        Args:
+            latency (float, optional): Milliseconds added to each matching request. Defaults to 0.0.
+            jitter (float, optional): Up to this many milliseconds (at random) added on top of the latency. Defaults to 0.0.
+            kbps (float, optional): Bandwidth cap for matching responses, in kilobytes per second (0 for none). Defaults to 0.0.
+            error_rate (float, optional): Share (0-1) of matching requests answered with an error. Defaults to 0.0.
+            error_status (int, optional): The status of error responses. Defaults to 503.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.kbps = kbps
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.injected = 0
+
+    @classmethod
+    def from_config(cls, config: pytest.Config) -> "FaultInjector":
+        return cls(
+            latency=config.getoption("inject_latency"),
+            jitter=config.getoption("inject_jitter"),
+            kbps=config.getoption("inject_kbps"),
+            error_rate=config.getoption("inject_error_rate"),
+        )
+
+    def enabled(self) -> bool:
+        return bool(self.latency or self.jitter or self.kbps or self.error_rate)
+
+    def install(self, context: BrowserContext, patterns: List[str]):
+        for pattern in patterns:
+            context.route(pattern, self._handle)
+
+    def _wait(self, route: Route, milliseconds: float):
+        """
+        Waits while letting Playwright handle other requests (unlike `time.sleep`, which would hold them all),
+        except for requests that don't belong to a page (e.g. from service workers).
+        """
+        if milliseconds <= 0:
+            return
+        try:
+            page = route.request.frame.page
+        except Error:
+            time.sleep(milliseconds / 1000)
+            return
+        page.wait_for_timeout(milliseconds)
+
+    def _handle(self, route: Route):
+        self.injected += 1
+        self._wait(route, self.latency + random.uniform(0, self.jitter))
+        if self.error_rate and random.random() < self.error_rate:
+            route.fulfill(status=self.error_status, body="Injected fault")
+            return
+        if not self.kbps:
+            route.fallback()
+            return
+        response = route.fetch()
+        self._wait(route, len(response.body()) / (self.kbps * 1024) * 1000)
+        route.fulfill(response=response)
@@ -0,0 +1,327 @@
+"""
+Keeps the results of each run (outcome and duration of each test) in a local SQLite database.
+
+Usage (from the root of the project), to share durations with shards running elsewhere (see `--durations-file`):
+    PYTHONPATH=tests python -m tooling.History durations [--history-db reports/history.db] [--output reports/durations.json]
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pytest
+
+
+class History:
+    """
+    Small local results database, recording the duration and outcome of each test across runs
+    (and how long each `expect` waited, see AdaptiveTimeouts).
+
+    It's a plain SQLite file (standard library only), so it can live in the `reports` folder
+    and survive between runs, including the Docker ones (as that folder is a volume).
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "run_id TEXT NOT NULL, nodeid TEXT NOT NULL, outcome TEXT NOT NULL, "
+            "duration REAL NOT NULL, finished_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_nodeid ON results (nodeid, finished_at)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS expect_waits ("
+            "run_id TEXT NOT NULL, site TEXT NOT NULL, waited REAL NOT NULL, "
+            "passed INTEGER NOT NULL, recorded_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS expect_waits_site "
+            "ON expect_waits (site, recorded_at)"
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, run_id: str, results: Dict[str, Dict]):
+        """
+        Stores the results of a run in a single transaction.
+
+        Args:
+            run_id (str): The identifier of the run the results belong to.
+            results (Dict[str, Dict]): Per test node id, a dict with its `outcome` and `duration` (in seconds).
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?)",
+                [
+                    (run_id, nodeid, result["outcome"], result["duration"], now)
+                    for nodeid, result in results.items()
+                ],
+            )
+
+    def _recent(self, last_runs: int) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Retrieves, per test, its most recent results (newest first).
+
+        Args:
+            last_runs (int): How many of the most recent results to retrieve per test.
+        """
+        rows = self.connection.execute(
+            "SELECT nodeid, outcome, duration FROM ("
+            "  SELECT *, ROW_NUMBER() OVER ("
+            "    PARTITION BY nodeid ORDER BY finished_at DESC"
+            "  ) AS position FROM results"
+            ") WHERE position <= ? ORDER BY nodeid, position",
+            (last_runs,),
+        )
+        recent: Dict[str, List] = {}
+        for nodeid, outcome, duration in rows:
+            recent.setdefault(nodeid, []).append((outcome, duration))
+        return recent
+
+    def durations(self, last_runs: int = 10) -> Dict[str, float]:
+        """
+        Estimates how long each test takes, based on the median of its most recent durations.
+
+        Args:
+            last_runs (int, optional): How many of the most recent results to consider per test. Defaults to 10.
+
+        Returns:
+            Dict[str, float]: The estimated duration (in seconds) per test node id.
+        """
+        return {
+            nodeid: statistics.median(duration for _, duration in results)
+            for nodeid, results in self._recent(last_runs).items()
+        }
+
+    def priorities(self, last_runs: int = 5) -> Dict[str, int]:
+        """
+        Ranks tests so that the ones more likely to fail can run first:
+        - 0: the test failed in its last run
+        - 1: the test is flaky (it both passed and failed in its most recent runs)
+        - 2: everything else (including tests we never saw before)
+
+        Args:
+            last_runs (int, optional): How many of the most recent results to consider per test. Defaults to 5.
+
+        Returns:
+            Dict[str, int]: The rank per test node id (tests never seen are not included).
+        """
+        priorities = {}
+        for nodeid, results in self._recent(last_runs).items():
+            outcomes = [outcome for outcome, _ in results]
+            if outcomes[0] == "failed":
+                priorities[nodeid] = 0
+            elif "failed" in outcomes and "passed" in outcomes:
+                priorities[nodeid] = 1
+            else:
+                priorities[nodeid] = 2
+        return priorities
+
+    def record_waits(self, run_id: str, waits: Sequence[Tuple[str, float, bool]]):
+        """
+        Stores how long each `expect` waited in a run, in a single transaction.
+
+        Args:
+            run_id (str): The identifier of the run the waits belong to.
+            waits (Sequence[Tuple[str, float, bool]]): The call site, how long it waited (in milliseconds), and if it passed.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO expect_waits VALUES (?, ?, ?, ?, ?)",
+                [(run_id, site, waited, passed, now) for site, waited, passed in waits],
+            )
+
+    def waits(self, last: int = 200) -> Dict[str, List[float]]:
+        """
+        Retrieves, per `expect` call site, how long its most recent passing assertions waited.
+
+        Args:
+            last (int, optional): How many of the most recent waits to retrieve per call site. Defaults to 200.
+
+        Returns:
+            Dict[str, List[float]]: The waits (in milliseconds) per call site.
+        """
+        rows = self.connection.execute(
+            "SELECT site, waited FROM ("
+            "  SELECT *, ROW_NUMBER() OVER ("
+            "    PARTITION BY site ORDER BY recorded_at DESC"
+            "  ) AS position FROM expect_waits WHERE passed"
+            ") WHERE position <= ?",
+            (last,),
+        )
+        waits: Dict[str, List[float]] = {}
+        for site, waited in rows:
+            waits.setdefault(site, []).append(waited)
+        return waits
+
+
+def balance_shards(
+    nodeids: Sequence[str], durations: Dict[str, float], num_shards: int
+) -> List[List[str]]:
+    """
+    Splits tests into shards with (roughly) the same total duration, using longest-first bin packing:
+    tests are taken from the slowest to the fastest and each is given to the shard with the least work so far.
+
+    Tests we have no history for are estimated with the median of the known durations.
+    Ties are broken by node id, so that every shard computes the exact same split.
+
+    Args:
+        nodeids (Sequence[str]): The node ids of the tests to split.
+        durations (Dict[str, float]): The estimated duration (in seconds) per test node id.
+        num_shards (int): How many shards to split the tests into.
+
+    Returns:
+        List[List[str]]: The node ids assigned to each shard.
+    """
+    default = statistics.median(durations.values()) if durations else 1.0
+    shards: List[List[str]] = [[] for _ in range(num_shards)]
+    loads = [(0.0, index) for index in range(num_shards)]
+    for nodeid in sorted(nodeids, key=lambda n: (-durations.get(n, default), n)):
+        load, index = heapq.heappop(loads)
+        shards[index].append(nodeid)
+        heapq.heappush(loads, (load + durations.get(nodeid, default), index))
+    return shards
+
+
+def failed_first(items: List, priorities: Dict[str, int]) -> List:
+    """
+    Orders tests by priority (see `History.priorities`), within each browser they run on.
+
+    Pytest groups tests by the session-scoped `browser_name` parameter, so that each browser is launched once;
+    sorting across browsers would interleave them, relaunching the browser over and over.
+
+    Args:
+        items (List): The collected tests, as pytest grouped them.
+        priorities (Dict[str, int]): The priority per test node id (lower runs first, 2 when unknown).
+
+    Returns:
+        List: The same tests, each browser still in one block, in the order they came in.
+    """
+
+    def browser(item) -> Optional[str]:
+        callspec = getattr(item, "callspec", None)
+        return callspec.params.get("browser_name") if callspec else None
+
+    groups: Dict[Optional[str], int] = {}
+    for item in items:
+        groups.setdefault(browser(item), len(groups))
+
+    # sort is stable, so tests with the same priority keep the file order
+    return sorted(
+        items, key=lambda item: (groups[browser(item)], priorities.get(item.nodeid, 2))
+    )
+
+
+def shared_durations(path: Optional[str]) -> Dict[str, float]:
+    """
+    Reads the durations shared by all shards (see `--durations-file`), as exported from a history database.
+
+    Args:
+        path (Optional[str]): The durations file (JSON, seconds per test node id), if any.
+
+    Returns:
+        Dict[str, float]: The durations, or none at all (so shards are split by test count alone) without a file.
+    """
+    if not path:
+        return {}
+    return json.loads(Path(path).read_text())
+
+
+class HistoryPlugin:
+    """
+    Pytest plugin feeding the History database with the results of each run, and using it
+    to run recently failing and flaky tests first (for fast feedback).
+
+    Shards are balanced by the durations of `--durations-file` instead, as shards running in different
+    CI jobs don't share a history database (see `main` to export one).
+    """
+
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.history = History(Path(config.getoption("history_db")))
+        self.run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.results: Dict[str, Dict] = {}
+        self.estimate: Optional[float] = None
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config: pytest.Config, items: List):
+        """Keeps only the tests of our shard (if sharding), then runs the ones likely to fail first."""
+        num_shards = config.getoption("num_shards")
+        durations = self.history.durations()
+        if num_shards > 1:
+            shard_id = config.getoption("shard_id")
+            # every shard must compute the same split, so durations can't come from our local history
+            shards = balance_shards(
+                [item.nodeid for item in items],
+                shared_durations(config.getoption("durations_file")),
+                num_shards,
+            )
+            selected = set(shards[shard_id])
+            deselected = [item for item in items if item.nodeid not in selected]
+            items[:] = [item for item in items if item.nodeid in selected]
+            config.hook.pytest_deselected(items=deselected)
+        if not config.getoption("no_failed_first"):
+            items[:] = failed_first(items, self.history.priorities())
+        if durations:
+            default = statistics.median(durations.values())
+            self.estimate = sum(durations.get(item.nodeid, default) for item in items)
+
+    def pytest_report_collectionfinish(self, config: pytest.Config, items: List):
+        """Tells which shard we are running and how long we expect it to take."""
+        lines = []
+        if config.getoption("num_shards") > 1:
+            lines.append(
+                f"shard {config.getoption('shard_id') + 1}/{config.getoption('num_shards')}: "
+                f"{len(items)} tests"
+            )
+        if self.estimate is not None:
+            lines.append(f"expected duration (from history): {self.estimate:.1f}s")
+        return lines
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        """Accumulates the duration of setup, call and teardown, and keeps the worst outcome."""
+        result = self.results.setdefault(
+            report.nodeid, {"outcome": "passed", "duration": 0.0}
+        )
+        result["duration"] += report.duration
+        if report.failed:
+            result["outcome"] = "failed"
+        elif report.skipped and result["outcome"] == "passed":
+            result["outcome"] = "skipped"
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        """Stores all results of this run at once, so that parallel runs do not fight for the database."""
+        if self.results:
+            self.history.record(self.run_id, self.results)
+        self.history.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["durations"])
+    parser.add_argument("--history-db", type=Path, default=Path("reports/history.db"))
+    parser.add_argument("--output", type=Path, default=Path("reports/durations.json"))
+    args = parser.parse_args()
+    history = History(args.history_db)
+    durations = history.durations()
+    history.close()
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(durations, indent=2, sort_keys=True))
+    print(f"Exported the durations of {len(durations)} tests to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
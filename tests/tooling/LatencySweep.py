@@ -0,0 +1,132 @@
+"""
+Runs the suite again and again with more and more injected latency, until each test fails, to find its latency headroom.
+
+Usage (from the root of the project):
+    PYTHONPATH=tests python -m tooling.LatencySweep [--latencies 0 250 500 1000 2000 4000] [-- <extra pytest arguments>]
+
+The headroom of a test is the highest latency it passed at (as well as at every lower one): how much slower
+the application can get before our `expect` and navigation timeouts (and retries) turn into flaky failures.
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .ResultsMerge import read_results
+
+LATENCIES = [0, 250, 500, 1000, 2000, 4000, 8000]
+
+# The default of `--history-db`
+HISTORY_DB = Path("reports/history.db")
+
+
+def sweep(latencies: List[float], pytest_args: List[str], output_dir: Path) -> Dict:
+    """
+    Runs pytest once per latency (one after the other, as they would compete for the machine otherwise),
+    each time only with the tests that did not fail yet, stopping once they all did.
+
+    Args:
+        latencies (List[float]): The latencies (in milliseconds) to inject, in increasing order.
+        pytest_args (List[str]): Extra arguments for every pytest process (e.g. `--inject-pattern` or `--browser`).
+        output_dir (Path): Where to write results files, logs and session summaries (a folder per latency).
+
+    Returns:
+        Dict: Per test, its `headroom` (None if it failed even without injected latency), the latency it
+        first `failed_at` (None if it never did), and its `durations` and `faults_injected` (how many of its
+        requests got the latency: past 0ms, none means `--inject-pattern` matched none of them) per latency.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    history = output_dir.joinpath("history.db")
+    tests: Dict[str, Dict] = {}
+    remaining: List[str] = []
+    for index, latency in enumerate(latencies):
+        results = output_dir.joinpath(f"latency_{latency:g}.jsonl")
+        # Each run gets a fresh copy of the results history: timeouts are the ones learned so far,
+        # and never the ones learned from the waits of the previous (slower) runs
+        history.unlink(missing_ok=True)
+        if HISTORY_DB.exists():
+            shutil.copy(HISTORY_DB, history)
+        command = [sys.executable, "-m", "pytest", "--inject-latency", f"{latency:g}"]
+        command += ["--results-file", str(results), "--history-db", str(history)]
+        command += ["--html", str(results.with_suffix(".html"))]
+        command += ["--summaries-dir", str(results.with_suffix(""))]
+        if index > 0:
+            command.append("--skip-lint")
+        print(
+            f"Injecting {latency:g}ms of latency into {len(remaining) or 'all'} tests"
+        )
+        with results.with_suffix(".log").open("w") as log:
+            subprocess.run(
+                command + pytest_args + remaining, stdout=log, stderr=subprocess.STDOUT
+            )
+        if not results.exists():
+            break
+        for entry in read_results(results):
+            if entry["type"] != "test" or entry["outcome"] == "skipped":
+                continue
+            test = tests.setdefault(
+                entry["nodeid"],
+                {
+                    "headroom": None,
+                    "failed_at": None,
+                    "durations": {},
+                    "faults_injected": {},
+                },
+            )
+            test["durations"][f"{latency:g}"] = entry["duration"]
+            test["faults_injected"][f"{latency:g}"] = entry["properties"].get(
+                "faults_injected", 0
+            )
+            if entry["outcome"] == "passed":
+                test["headroom"] = latency
+            else:
+                test["failed_at"] = latency
+        remaining = [
+            nodeid for nodeid, test in tests.items() if test["failed_at"] is None
+        ]
+        if not remaining:
+            break
+    return tests
+
+
+def _format(latency: Optional[float]) -> str:
+    return "-" if latency is None else f"{latency:g}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latencies", nargs="+", type=float, default=LATENCIES)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("reports/latency_sweep").joinpath(
+            datetime.now().strftime("%Y%m%d_%H%M%S")
+        ),
+    )
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    pytest_args = (
+        args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    )
+    tests = sweep(sorted(args.latencies), pytest_args, args.output)
+    args.output.joinpath("headroom.json").write_text(json.dumps(tests, indent=2))
+
+    width = max((len(nodeid) for nodeid in tests), default=4)
+    print(f"\n{'Test':<{width}}  {'Headroom':>9}  {'Failed at':>9}")
+    for nodeid, test in sorted(
+        tests.items(), key=lambda item: item[1]["headroom"] or 0
+    ):
+        print(
+            f"{nodeid:<{width}}  {_format(test['headroom']):>9}  "
+            f"{_format(test['failed_at']):>9}"
+        )
+    print(f"\nLatency headroom: {args.output.joinpath('headroom.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import shutil
+import subprocess
+from typing import Callable, List, Tuple
+
+# Leaving as a comment here in case we _only_ want to check for issues, not fix them
+# CHECKS = [
+#     ("ruff", ["ruff", "check", "."]),
+#     ("isort", ["isort", "--check-only", "."]),
+#     ("black", ["black", "--check", "."]),
+# ]
+CHECKS = [
+    ("ruff", ["ruff", "check", ".", "--fix"]),
+    ("ruff", ["ruff", "check", "."]),
+    ("isort", ["isort", "."]),
+    ("isort", ["isort", "--check-only", "."]),
+    ("black", ["black", "."]),
+    ("black", ["black", "--check", "."]),
+]
+
+
+def _run_cmd(cmd):
+    """
+    Runs a command in the terminal and returns its return code and output
+    """
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return proc.returncode, proc.stdout.decode(errors="replace")
+    except FileNotFoundError:
+        return None, f"{cmd[0]} not found"
+
+
+def lint(warn: Callable[[str], None] = print) -> List[Tuple[str, str]]:
+    """
+    Fixes lint/format issues, then checks that none are left (see `pytest_sessionstart` and tooling/Matrix.py).
+
+    Args:
+        warn (Callable[[str], None], optional): How to warn about tools that are not installed (and skipped). Defaults to print.
+
+    Returns:
+        List[Tuple[str, str]]: The name and output of each check that failed.
+    """
+    failures = []
+    for name, cmd in CHECKS:
+        if shutil.which(cmd[0]) is None:
+            # tool not installed — skip but warn
+            warn(f"{name} not installed; skipping {name} check")
+            continue
+        rc, out = _run_cmd(cmd)
+        if rc != 0:
+            failures.append((name, out))
+    return failures
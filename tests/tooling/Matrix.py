@@ -0,0 +1,153 @@
+"""
+Runs the suite on several browsers at once (one process per browser), merging the results into a single report.
+
+Usage (from the root of the project):
+    PYTHONPATH=tests python -m tooling.Matrix [--browsers chromium firefox webkit] [-- <extra pytest arguments>]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from datetime import datetime
+from html import escape
+from pathlib import Path
+from typing import Dict, List
+
+from .Lint import lint
+from .ResultsMerge import read_results
+
+BROWSERS = ["chromium", "firefox", "webkit"]
+
+
+def run_matrix(browsers: List[str], pytest_args: List[str], output_dir: Path) -> int:
+    """
+    Runs pytest once per browser, all in parallel, each with its own HTML report, results file, log
+    and session summaries (traces, network, memory and soak, in a folder named after the browser).
+
+    Lint and format checks run once before, as processes fixing files while others import them would race.
+
+    Args:
+        browsers (List[str]): The browsers to run the tests on.
+        pytest_args (List[str]): Extra arguments for every pytest process.
+        output_dir (Path): Where to write reports, results files and logs.
+
+    Returns:
+        int: 0 if the tests passed on every browser, or the first non-zero pytest exit code otherwise
+        (1 if lint and format checks failed, without running any test).
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    failures = lint()
+    if failures:
+        for name, out in failures:
+            print(f"{name} failed:\n{out}")
+        return 1
+    started = time.time()
+    processes = []
+    for browser in browsers:
+        command = [sys.executable, "-m", "pytest", "--browser", browser, "--skip-lint"]
+        command += ["--html", str(output_dir.joinpath(f"{browser}.html"))]
+        command += ["--results-file", str(output_dir.joinpath(f"{browser}.jsonl"))]
+        command += ["--summaries-dir", str(output_dir.joinpath(browser))]
+        log = output_dir.joinpath(f"{browser}.log").open("w")
+        processes.append(
+            (
+                subprocess.Popen(
+                    command + pytest_args, stdout=log, stderr=subprocess.STDOUT
+                ),
+                log,
+            )
+        )
+    exit_codes = []
+    for process, log in processes:
+        exit_codes.append(process.wait())
+        log.close()
+    write_matrix_report(browsers, output_dir, time.time() - started)
+    return next((code for code in exit_codes if code != 0), 0)
+
+
+def write_matrix_report(browsers: List[str], output_dir: Path, wall_clock: float):
+    """
+    Merges the results files of each browser into one HTML report: one row per test, one column per browser,
+    and how much slower the slowest browser was compared to the fastest one.
+    """
+    tests: Dict[str, Dict[str, Dict]] = {}
+    totals = {browser: {"duration": 0.0, "failed": 0} for browser in browsers}
+    for browser in browsers:
+        results = output_dir.joinpath(f"{browser}.jsonl")
+        if not results.exists():
+            continue
+        for entry in read_results(results):
+            if entry["type"] != "test":
+                continue
+            tests.setdefault(entry["test"], {})[browser] = entry
+            totals[browser]["duration"] += entry["duration"]
+            totals[browser]["failed"] += entry["outcome"] == "failed"
+
+    rows = []
+    for test, per_browser in tests.items():
+        cells = "".join(
+            (
+                f'<td class="{per_browser[browser]["outcome"]}">'
+                f'{per_browser[browser]["outcome"]} '
+                f'{per_browser[browser]["duration"]:.1f}s</td>'
+                if browser in per_browser
+                else "<td>-</td>"
+            )
+            for browser in browsers
+        )
+        durations = {b: e["duration"] for b, e in per_browser.items()}
+        slowest = max(durations, key=durations.get)
+        fastest = min(durations, key=durations.get)
+        spread = (
+            (durations[slowest] / durations[fastest] - 1) * 100
+            if durations[fastest]
+            else 0
+        )
+        rows.append(
+            f"<tr><td>{escape(test)}</td>{cells}"
+            f"<td>{slowest} +{spread:.0f}% vs {fastest}</td></tr>"
+        )
+    header = "".join(
+        f'<th><a href="{browser}.html">{browser}</a></th>' for browser in browsers
+    )
+    footer = "".join(
+        f"<td>{totals[browser]['duration']:.1f}s, {totals[browser]['failed']} failed</td>"
+        for browser in browsers
+    )
+    sequential = sum(total["duration"] for total in totals.values())
+    output_dir.joinpath("index.html").write_text(
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Browser matrix</title>"
+        "<style>td, th {padding: 4px 8px; text-align: left}"
+        " .passed {color: green} .failed {color: red} .skipped {color: orange}</style>"
+        f"</head><body><h1>Browser matrix ({datetime.now():%Y-%m-%d %H:%M:%S})</h1>"
+        f"<p>Wall clock: {wall_clock:.1f}s "
+        f"(the browsers would take {sequential:.1f}s one after the other)</p>"
+        f"<table><tr><th>Test</th>{header}<th>Slowest</th></tr>{''.join(rows)}"
+        f"<tr><th>Total</th>{footer}<td></td></tr></table></body></html>",
+        encoding="utf-8",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--browsers", nargs="+", choices=BROWSERS, default=BROWSERS)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("reports/matrix").joinpath(
+            datetime.now().strftime("%Y%m%d_%H%M%S")
+        ),
+    )
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    pytest_args = (
+        args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    )
+    exit_code = run_matrix(args.browsers, pytest_args, args.output)
+    print(f"Browser matrix report: {args.output.joinpath('index.html')}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import json
+import os
+import time
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+import pytest
+from playwright.sync_api import Browser, Error, Page
+
+
+def _parents() -> Dict[int, int]:
+    """
+    Maps each process to its parent (Linux only, reading /proc).
+    """
+    parents: Dict[int, int] = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # the process name (2nd field) may contain spaces, so split after it
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents[int(stat.parent.name)] = int(fields[1])
+    return parents
+
+
+def _children(pid: int, parents: Dict[int, int]) -> Set[int]:
+    """
+    Finds all processes descending from `pid`.
+    """
+    descendants: Set[int] = set()
+    pending = [pid]
+    while pending:
+        parent = pending.pop()
+        for child, child_parent in parents.items():
+            if child_parent == parent and child not in descendants:
+                descendants.add(child)
+                pending.append(child)
+    return descendants
+
+
+def _browser_pids(browser: Browser) -> Set[int]:
+    """
+    Finds the processes of a browser we launched (not the Playwright driver launching it).
+
+    Chromium tells its own processes (browser, renderers, GPU...) over CDP. For other browsers (Linux only),
+    they are what descends from the driver, which is the one process pytest starts.
+    """
+    try:
+        cdp = browser.new_browser_cdp_session()
+        try:
+            processes = cdp.send("SystemInfo.getProcessInfo")["processInfo"]
+        finally:
+            cdp.detach()
+        return {process["id"] for process in processes}
+    except Error:
+        pass
+    if not Path("/proc").exists():
+        return set()
+    parents = _parents()
+    drivers = [child for child, parent in parents.items() if parent == os.getpid()]
+    return set().union(*(_children(driver, parents) for driver in drivers))
+
+
+def _rss(pids: Set[int]) -> Optional[int]:
+    """
+    Sums the resident memory (in bytes) of the given processes, or None if it's not available.
+    """
+    total = None
+    for pid in pids:
+        try:
+            status = Path(f"/proc/{pid}/status").read_text()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total = (total or 0) + int(line.split()[1]) * 1024
+    return total
+
+
+def monotonic_growth(
+    values: Sequence[Optional[float]], tolerance: float = 0.02, min_points: int = 4
+) -> Optional[float]:
+    """
+    Tells if a series only grows (allowing each point to drop a bit, for noise such as garbage collection).
+
+    Args:
+        values (Sequence[Optional[float]]): The series, where missing points are None.
+        tolerance (float, optional): How much (relative) a point may drop and still count as growing. Defaults to 0.02.
+        min_points (int, optional): How many points are needed to tell anything. Defaults to 4.
+
+    Returns:
+        Optional[float]: How much the series grew (e.g. 0.5 for 50%), if it grew monotonically, otherwise None.
+    """
+    points = [value for value in values if value]
+    if len(points) < min_points or points[-1] <= points[0]:
+        return None
+    if all(b >= a * (1 - tolerance) for a, b in zip(points, points[1:])):
+        return points[-1] / points[0] - 1
+    return None
+
+
+class MemorySampler:
+    """
+    Samples the JS heap of a test's page (via CDP, chromium only) and the RSS of the browser processes
+    (Linux only) at test boundaries and after each page object step.
+
+    Each sample follows a garbage collection, so that garbage piling up between collections doesn't look like
+    a leak. The RSS of browsers connected to a warm server (see tooling/BrowserServer.py) is not available:
+    they are not ours to measure, as other runs share them.
+    """
+
+    def __init__(
+        self, page: Page, plugin: "MemoryPlugin", nodeid: str, connected: bool = False
+    ):
+        self.plugin = plugin
+        self.nodeid = nodeid
+        self.browser = page.context.browser
+        self.connected = connected
+        self.pids: Set[int] = set()
+        try:
+            self.cdp = page.context.new_cdp_session(page)
+        except Error:
+            self.cdp = None
+
+    def sample(self, event: str):
+        js_heap = None
+        if self.cdp is not None:
+            try:
+                self.cdp.send("HeapProfiler.collectGarbage")
+                js_heap = self.cdp.send("Runtime.getHeapUsage")["usedSize"]
+            except Error:
+                pass
+        self.plugin.samples.append(
+            {
+                "time": time.time() - self.plugin.started_at,
+                "test": self.nodeid,
+                "event": event,
+                "js_heap": js_heap,
+                "rss": None if self.connected else _rss(self.pids),
+            }
+        )
+
+    def test_boundary(self, event: str):
+        """Samples when a test starts or ends, looking for new browser processes (e.g. renderers) first."""
+        if not self.connected:
+            self.pids = _browser_pids(self.browser)
+        self.sample(event)
+
+    def step_started(self, name: str):
+        pass
+
+    def step_finished(self, name: str, duration: float, failed: bool):
+        self.sample(name)
+
+
+def _chart(values: List[Optional[float]], color: str) -> str:
+    """
+    Draws a series as an SVG polyline (with no external dependency), scaled to its own maximum.
+    """
+    top = max((value for value in values if value), default=0)
+    if not top:
+        return ""
+    step = 800 / max(len(values) - 1, 1)
+    points = " ".join(
+        f"{index * step:.1f},{150 - value / top * 140:.1f}"
+        for index, value in enumerate(values)
+        if value
+    )
+    return f'<polyline fill="none" stroke="{color}" points="{points}"/>'
+
+
+class MemoryPlugin:
+    """
+    Pytest plugin keeping the time series of memory samples taken by each test (see the `page` fixture),
+    saving it as JSON and charting it in the HTML report, flagging memory that only grows.
+    """
+
+    def __init__(self, config: pytest.Config, path: Path = Path("reports/memory.json")):
+        self.config = config
+        self.path = path
+        self.started_at = time.time()
+        self.samples: List[Dict] = []
+
+    def flags(self) -> List[str]:
+        """
+        Looks for leaks: browser RSS only growing from one test to the next (time to recycle the browser),
+        and JS heap only growing along the steps of a test (a leak in the application itself).
+        """
+        flags = []
+        test_ends = [sample for sample in self.samples if sample["event"] == "test end"]
+        growth = monotonic_growth([sample["rss"] for sample in test_ends])
+        if growth:
+            flags.append(
+                f"Browser RSS grew {growth:.0%} over {len(test_ends)} tests, "
+                "consider recycling the browser"
+            )
+        tests: Dict[str, List] = {}
+        for sample in self.samples:
+            tests.setdefault(sample["test"], []).append(sample["js_heap"])
+        for test, heap in tests.items():
+            growth = monotonic_growth(heap, min_points=6)
+            if growth:
+                flags.append(f"JS heap grew {growth:.0%} along the steps of {test}")
+        return flags
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if self.samples:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(
+                json.dumps({"flags": self.flags(), "samples": self.samples}, indent=2)
+            )
+
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        """Adds the memory chart (JS heap in blue, browser RSS in red) and any leak flag."""
+        if not self.samples:
+            return
+        flags = "".join(f"<li>{escape(flag)}</li>" for flag in self.flags())
+        heap = [sample["js_heap"] for sample in self.samples]
+        rss = [sample["rss"] for sample in self.samples]
+        postfix.append(
+            f"<h2>Memory ({len(self.samples)} samples)</h2>"
+            f"<p>JS heap (blue) peaked at {max(filter(None, heap), default=0) / 2**20:.0f}MB, "
+            f"browser RSS (red) at {max(filter(None, rss), default=0) / 2**20:.0f}MB</p>"
+            f'<svg width="800" height="160" style="border: 1px solid #ccc">'
+            f"{_chart(heap, 'blue')}{_chart(rss, 'red')}</svg>"
+            f"<ul>{flags}</ul>"
+        )
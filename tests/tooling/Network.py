@@ -0,0 +1,184 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+from playwright.sync_api import BrowserContext, Error, Request, Response
+
+# Requests made outside of any page object step (e.g. by a test directly)
+NO_STEP = "(no step)"
+
+
+class NetworkProfile:
+    """
+    Listens to the requests of a browser context and aggregates what a test costs on the wire:
+    request count, transferred bytes, cache hits and slowest URLs, per test and per page object step.
+
+    A request belongs to the step running when it was sent (not when it finished). To keep the overhead low
+    while the test runs, listeners make no round trip to the browser: sizes come from the `content-length`
+    header at first, and the ones of first party requests (which chunked responses would leave out) are only
+    asked for when the profile is summarised (see `summary`). Timings come from the request.
+    """
+
+    def __init__(self, context: BrowserContext, base_url: str):
+        self.first_party = urlsplit(base_url).hostname
+        self.steps: List[str] = []
+        self.requests: List[Dict] = []
+        self._steps: Dict[Request, str] = {}
+        self._responses: Dict[Request, Response] = {}
+        # First party requests whose actual size is yet to be asked for
+        self._unsized: List[Tuple[Dict, Request]] = []
+        context.on("request", self._on_request)
+        context.on("response", self._on_response)
+        context.on("requestfinished", self._on_finished)
+        context.on("requestfailed", self._on_failed)
+
+    def step_started(self, name: str):
+        self.steps.append(name)
+
+    def step_finished(self, name: str, duration: float, failed: bool):
+        # steps can be nested, so what comes next belongs to the step we are back into
+        self.steps.pop()
+
+    def _on_request(self, request: Request):
+        self._steps[request] = self.steps[-1] if self.steps else NO_STEP
+
+    def _on_response(self, response: Response):
+        self._responses[response.request] = response
+
+    def _record(self, request: Request, failed: bool):
+        response = self._responses.pop(request, None)
+        timing = request.timing
+        url = urlsplit(request.url)
+        cache_hit = response is not None and (
+            response.status == 304
+            or response.from_service_worker
+            or timing["requestStart"] == -1
+        )
+        entry = {
+            "url": f"{url.scheme}://{url.netloc}{url.path}",
+            "third_party": url.hostname != self.first_party,
+            "step": self._steps.pop(request, NO_STEP),
+            "status": response.status if response is not None else None,
+            "failed": failed,
+            "bytes": (
+                int(response.headers.get("content-length", 0)) if response else 0
+            ),
+            "cache_hit": cache_hit,
+            "duration": max(timing["responseEnd"], 0),
+        }
+        self.requests.append(entry)
+        if response is not None and not entry["third_party"]:
+            self._unsized.append((entry, request))
+
+    def _size(self):
+        """Replaces the `content-length` of first party requests with what was actually transferred."""
+        for entry, request in self._unsized:
+            try:
+                sizes = request.sizes()
+            except Error:
+                continue
+            entry["bytes"] = sizes["responseHeadersSize"] + sizes["responseBodySize"]
+        self._unsized = []
+
+    def _on_finished(self, request: Request):
+        self._record(request, failed=False)
+
+    def _on_failed(self, request: Request):
+        self._record(request, failed=True)
+
+    def summary(self, slowest: int = 5) -> Dict:
+        """
+        Aggregates the requests seen so far.
+
+        Args:
+            slowest (int, optional): How many of the slowest URLs to list, for the test and for each step. Defaults to 5.
+
+        Returns:
+            Dict: Totals for the test, split by first/third party, per step (with its slowest URLs),
+            and the slowest URLs (durations in ms).
+        """
+        self._size()
+
+        def totals(requests: List[Dict]) -> Dict:
+            return {
+                "requests": len(requests),
+                "bytes": sum(request["bytes"] for request in requests),
+                "cache_hits": sum(request["cache_hit"] for request in requests),
+                "failed": sum(request["failed"] for request in requests),
+            }
+
+        def slowest_of(requests: List[Dict]) -> List[Dict]:
+            return [
+                {key: request[key] for key in ("url", "step", "duration", "bytes")}
+                for request in sorted(requests, key=lambda r: -r["duration"])[:slowest]
+            ]
+
+        steps: Dict[str, List[Dict]] = {}
+        for request in self.requests:
+            steps.setdefault(request["step"], []).append(request)
+        return {
+            **totals(self.requests),
+            "third_party": totals(
+                [request for request in self.requests if request["third_party"]]
+            ),
+            "steps": {
+                step: {**totals(requests), "slowest": slowest_of(requests)}
+                for step, requests in steps.items()
+            },
+            "slowest": slowest_of(self.requests),
+        }
+
+
+class NetworkPlugin:
+    """
+    Pytest plugin collecting the network profile of each test (see the `context` fixture) into report columns
+    and a JSON summary of the whole session (`reports/network_summary.json`).
+    """
+
+    def __init__(
+        self, config: pytest.Config, path: Path = Path("reports/network_summary.json")
+    ):
+        self.config = config
+        self.path = path
+        self.summaries: Dict[str, Dict] = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call):
+        """Adds the network totals of the test to its report, once the test ran."""
+        outcome = yield
+        report = outcome.get_result()
+        profile: NetworkProfile = getattr(item, "network_profile", None)
+        if report.when != "call" or profile is None:
+            return
+        summary = profile.summary()
+        self.summaries[item.nodeid] = summary
+        report.user_properties += [
+            ("requests", summary["requests"]),
+            ("transferred_kb", round(summary["bytes"] / 1024, 1)),
+            ("third_party_kb", round(summary["third_party"]["bytes"] / 1024, 1)),
+            ("cache_hits", summary["cache_hits"]),
+        ]
+
+    def pytest_html_results_table_header(self, cells):
+        cells.append("<th>Requests</th>")
+        cells.append('<th title="third party in parenthesis">Transferred</th>')
+
+    def pytest_html_results_table_row(self, report, cells):
+        properties = dict(report.user_properties)
+        if "requests" not in properties:
+            cells += ["<td></td>", "<td></td>"]
+            return
+        cells.append(
+            f"<td>{properties['requests']} ({properties['cache_hits']} cached)</td>"
+        )
+        cells.append(
+            f"<td>{properties['transferred_kb']}KB "
+            f"({properties['third_party_kb']}KB)</td>"
+        )
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if self.summaries:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self.summaries, indent=2))
@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import sys
+import time
+from base64 import b64decode
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+
+def artifact_name(nodeid: str) -> str:
+    """
+    Turns a test node id into something safe to use as a file (or folder) name.
+    """
+    return re.sub(r"[^\w.-]+", "-", nodeid)
+
+
+def _test_entry(nodeid: str, test: str, browser: Optional[str]) -> Dict:
+    return {
+        "type": "test",
+        "nodeid": nodeid,
+        "test": test,
+        "browser": browser,
+        "outcome": "passed",
+        "duration": 0.0,
+        "description": None,
+        "longrepr": None,
+        "logs": "",
+        "properties": {},
+        "artifacts": [],
+    }
+
+
+class ResultsPlugin:
+    """
+    Pytest plugin writing a compact, machine-readable results file (JSON lines): a header describing the run,
+    then one line per test as soon as it finishes, so partial results survive even if the run is interrupted.
+
+    Artifacts (screenshots, videos, and traces) are referenced by their path, relative to the results file,
+    so that results files can be merged (see ResultsMerge) without loading any of them.
+    Failures keep their reason and logs, so that merged reports still tell why a test failed.
+    """
+
+    def __init__(self, config: pytest.Config, path: Path):
+        self.config = config
+        self.path = path
+        self.artifacts_dir = path.parent.joinpath("artifacts")
+        self.tests: Dict[str, Dict] = {}
+        self.file = None
+
+    def _add_artifact(self, entry: Dict, kind: str, name: str, path: Path):
+        entry["artifacts"].append(
+            {
+                "kind": kind,
+                "name": name,
+                "path": os.path.relpath(path, self.path.parent),
+            }
+        )
+
+    def _save_extras(self, entry: Dict, report: pytest.TestReport):
+        """
+        Saves the screenshots embedded in the report extras as files, and references the other artifacts.
+        """
+        for extra in getattr(report, "extras", []):
+            if extra["format_type"] == "image":
+                # one folder per results file, so other runs don't overwrite our screenshots
+                folder = self.artifacts_dir.joinpath(
+                    self.path.stem, artifact_name(report.nodeid)
+                )
+                folder.mkdir(parents=True, exist_ok=True)
+                image = folder.joinpath(
+                    f"{len(entry['artifacts'])}.{extra['extension']}"
+                )
+                image.write_bytes(b64decode(extra["content"]))
+                self._add_artifact(entry, "image", extra["name"], image)
+            elif extra["format_type"] == "url":
+                # our URLs (e.g. videos) are relative to the reports folder
+                self._add_artifact(
+                    entry, "url", extra["name"], Path("reports", extra["content"])
+                )
+
+    def _write(self, entry: Dict):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def pytest_sessionstart(self, session: pytest.Session):
+        """Opens the results file, starting with what identifies this run."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = self.path.open("w", encoding="utf-8")
+        self._write(
+            {
+                "type": "session",
+                "browsers": self.config.getoption("browser") or ["chromium"],
+                "shard": [
+                    self.config.getoption("shard_id"),
+                    self.config.getoption("num_shards"),
+                ],
+                "platform": sys.platform,
+                # the full HTML report of the run, with the summaries of our plugins
+                "html_report": (
+                    os.path.relpath(self.config.option.htmlpath, self.path.parent)
+                    if self.config.option.htmlpath
+                    else None
+                ),
+                "pid": os.getpid(),
+                "started_at": time.time(),
+            }
+        )
+
+    def pytest_collection_modifyitems(self, items):
+        """Knows, per test, its name regardless of the browser, and which browser it runs on."""
+        for item in items:
+            params = getattr(item, "callspec", None)
+            params = params.params if params else {}
+            test = item.nodeid
+            if list(params) == ["browser_name"]:
+                test = test.rsplit("[", 1)[0]
+            self.tests[item.nodeid] = _test_entry(
+                item.nodeid, test, params.get("browser_name")
+            )
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        """Accumulates the duration, worst outcome, and properties of setup, call and teardown."""
+        entry = self.tests.setdefault(
+            report.nodeid, _test_entry(report.nodeid, report.nodeid, None)
+        )
+        entry["duration"] += report.duration
+        entry["properties"].update(report.user_properties)
+        self._save_extras(entry, report)
+        entry["description"] = getattr(report, "description", entry["description"])
+        entry["logs"] += report.caplog
+        if report.failed:
+            entry["outcome"] = "failed"
+            # why it failed (in setup, call or teardown), as pytest tells it
+            entry["longrepr"] = "\n\n".join(
+                filter(None, [entry["longrepr"], report.longreprtext])
+            )
+        elif report.skipped and entry["outcome"] == "passed":
+            entry["outcome"] = "skipped"
+
+    def pytest_runtest_logfinish(self, nodeid: str):
+        """Writes the test as soon as it finishes (its trace, if any, was saved by then)."""
+        entry = self.tests[nodeid]
+        # logs only help understand failures, and would make the file as big as the whole run log otherwise
+        if entry["outcome"] != "failed":
+            entry["logs"] = ""
+        traces = self.config.pluginmanager.get_plugin("traces")
+        if traces is not None and nodeid in traces.traces:
+            self._add_artifact(entry, "trace", "Trace", traces.traces[nodeid])
+        self._write(entry)
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        if self.file is not None:
+            self.file.close()
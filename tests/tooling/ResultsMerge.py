@@ -0,0 +1,154 @@
+"""
+Merges the results files of any number of runs (e.g. shards running in different CI jobs) into a single HTML report.
+
+Usage (from the root of the project):
+    PYTHONPATH=tests python -m tooling.ResultsMerge reports/**/*.jsonl --output reports/index.html
+
+Only the standard library is needed, so it can run where the tests did not (e.g. when publishing reports).
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from html import escape
+from pathlib import Path
+from typing import Dict, Iterator, List, TextIO
+
+STYLE = (
+    "body {font-family: sans-serif} td, th {padding: 4px 8px; text-align: left;"
+    " vertical-align: top} .passed {color: green} .failed {color: red}"
+    " .skipped {color: orange} img {max-width: 320px; margin: 2px}"
+)
+
+
+def read_results(path: Path) -> Iterator[Dict]:
+    """
+    Streams the entries of a results file, one at a time.
+
+    Args:
+        path (Path): The results file (JSON lines), as written by ResultsPlugin.
+
+    Yields:
+        Dict: The entries, either the session header (`"type": "session"`) or a test (`"type": "test"`).
+    """
+    with path.open(encoding="utf-8") as results:
+        for line in results:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _artifacts_html(entry: Dict, base: Path, output_dir: Path) -> str:
+    """
+    Links to the artifacts of a test (paths in results files are relative to the results file itself).
+    Screenshots are lazy loaded images, so neither the merge nor opening the report loads them all at once.
+    """
+    links = []
+    for artifact in entry.get("artifacts", []):
+        href = escape(os.path.relpath(base.joinpath(artifact["path"]), output_dir))
+        if artifact["kind"] == "image":
+            links.append(f'<a href="{href}"><img loading="lazy" src="{href}"></a>')
+        else:
+            links.append(f'<a href="{href}">{escape(artifact["name"])}</a>')
+    if not links:
+        return ""
+    return (
+        f"<details><summary>{len(links)} artifacts</summary>{''.join(links)}</details>"
+    )
+
+
+def _failure_html(entry: Dict) -> str:
+    """Why a test failed (and what it logged), folded so the table stays readable."""
+    if not entry.get("longrepr"):
+        return ""
+    logs = f"<pre>{escape(entry['logs'])}</pre>" if entry.get("logs") else ""
+    return (
+        "<details><summary>Failure</summary>"
+        f"<pre>{escape(entry['longrepr'])}</pre>{logs}</details>"
+    )
+
+
+def _write_rows(results_file: Path, shard: str, output: TextIO, output_dir: Path):
+    for entry in read_results(results_file):
+        if entry["type"] != "test":
+            continue
+        properties = ", ".join(
+            f"{escape(str(key))}: {escape(str(value))}"
+            for key, value in entry["properties"].items()
+        )
+        description = escape((entry.get("description") or "").strip())
+        output.write(
+            f'<tr><td title="{description}">{escape(entry["nodeid"])}'
+            f"{_failure_html(entry)}</td><td>{shard}</td>"
+            f'<td class="{entry["outcome"]}">{entry["outcome"]}</td>'
+            f"<td>{entry['duration']:.1f}s</td><td>{properties}</td>"
+            f"<td>{_artifacts_html(entry, results_file.parent, output_dir)}</td></tr>\n"
+        )
+
+
+def merge(results_files: List[Path], output: Path) -> Dict[str, int]:
+    """
+    Builds a single HTML report out of many results files.
+
+    Results files are streamed twice: once to count outcomes, and once to write each test straight into the report,
+    so memory use does not grow with the number of tests (and screenshots are only referenced, never loaded).
+
+    Args:
+        results_files (List[Path]): The results files to merge.
+        output (Path): The HTML report to write.
+
+    Returns:
+        Dict[str, int]: How many tests had each outcome.
+    """
+    outcomes: Dict[str, int] = {}
+    duration = 0.0
+    shards = []
+    for results_file in results_files:
+        shard = escape(results_file.stem)
+        for entry in read_results(results_file):
+            if entry["type"] == "session":
+                shard_id, num_shards = entry["shard"]
+                shard = escape(
+                    f"{'/'.join(entry['browsers'])} {shard_id + 1}/{num_shards}"
+                )
+                # link to the full HTML report of the shard, with the summaries of our plugins
+                html_report = entry.get("html_report")
+                if html_report:
+                    href = os.path.relpath(
+                        results_file.parent.joinpath(html_report), output.parent
+                    )
+                    shard = f'<a href="{escape(href)}">{shard}</a>'
+            else:
+                outcomes[entry["outcome"]] = outcomes.get(entry["outcome"], 0) + 1
+                duration += entry["duration"]
+        shards.append(shard)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    summary = ", ".join(f"{count} {outcome}" for outcome, count in outcomes.items())
+    with output.open("w", encoding="utf-8") as html:
+        html.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Test report</title>"
+            f"<style>{STYLE}</style></head><body>"
+            f"<h1>Test report ({datetime.now():%Y-%m-%d %H:%M:%S})</h1>"
+            f"<p>{len(results_files)} results files: {summary} "
+            f"in {duration:.1f}s of test time</p>"
+            "<table><tr><th>Test</th><th>Shard</th><th>Result</th><th>Duration</th>"
+            "<th>Properties</th><th>Artifacts</th></tr>\n"
+        )
+        for results_file, shard in zip(results_files, shards):
+            _write_rows(results_file, shard, html, output.parent)
+        html.write("</table></body></html>\n")
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("results_files", nargs="+", type=Path)
+    parser.add_argument("--output", type=Path, default=Path("reports/index.html"))
+    args = parser.parse_args()
+    outcomes = merge(args.results_files, args.output)
+    print(f"Merged {sum(outcomes.values())} tests into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
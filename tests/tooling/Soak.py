@@ -0,0 +1,219 @@
+import json
+import time
+from contextlib import contextmanager
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+from pages.base.Reporter import Reporter
+
+from .Stats import percentile
+
+
+def latency_drift(
+    iterations: List[Dict], window: Optional[int] = None
+) -> Dict[str, Dict]:
+    """
+    Compares, per step, the median latency of the first iterations of a soak with the last ones.
+
+    Args:
+        iterations (List[Dict]): The iterations, as recorded by SoakRecorder (failed ones are left out).
+        window (Optional[int], optional): How many iterations to compare on each end. Defaults to 10% of them (at least 1).
+
+    Returns:
+        Dict[str, Dict]: Per step, its `first` and `last` median latency (in seconds) and the `drift` between them
+        (e.g. 0.5 when the last iterations are 50% slower).
+    """
+    passed = [iteration for iteration in iterations if not iteration["failed"]]
+    window = window or max(len(passed) // 10, 1)
+    drift = {}
+    for name in {name for iteration in passed for name in iteration["steps"]}:
+        first = [i["steps"][name] for i in passed[:window] if name in i["steps"]]
+        last = [i["steps"][name] for i in passed[-window:] if name in i["steps"]]
+        if not first or not last:
+            continue
+        first_p50, last_p50 = percentile(first, 50), percentile(last, 50)
+        drift[name] = {
+            "first": first_p50,
+            "last": last_p50,
+            "drift": last_p50 / first_p50 - 1 if first_p50 else 0.0,
+        }
+    return dict(sorted(drift.items(), key=lambda item: -item[1]["drift"]))
+
+
+class SoakRecorder:
+    """
+    Follows the page object steps of a soak test (as a step listener), recording each iteration of its journey:
+    how long each step took, the retries it needed, whether it failed, and how big the application data got.
+
+    Screenshots are turned off on the reporter, as hours of them would not fit in an HTML report (or in memory).
+    Iterations are kept per test, so that each soak test of a session gets its own count and error rate.
+    """
+
+    def __init__(self, plugin: "SoakPlugin", reporter: Reporter, nodeid: str):
+        self.plugin = plugin
+        self.reporter = reporter
+        self.reporter.snapshots = False
+        self.reporter.step_listeners.append(self)
+        self.started_at = time.time()
+        self.steps: Dict[str, float] = {}
+        self.iterations: List[Dict] = plugin.iterations.setdefault(nodeid, [])
+
+    def keep_going(self) -> bool:
+        """Tells if there is another iteration to run, per `--soak-iterations` and `--soak-hours`."""
+        iterations = self.plugin.config.getoption("soak_iterations")
+        hours = self.plugin.config.getoption("soak_hours")
+        if iterations and len(self.iterations) >= iterations:
+            return False
+        if hours and time.time() - self.started_at >= hours * 3600:
+            return False
+        return True
+
+    @contextmanager
+    def iteration(self):
+        """
+        Runs one iteration of the journey, recording it. Failures are recorded rather than raised,
+        so that a soak goes on (the next iteration starts by navigating again).
+        """
+        self.steps = {}
+        retries = len(self.reporter.retries)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {str(exception).splitlines()[0]}"
+            self.reporter.log(
+                f"Soak iteration {len(self.iterations) + 1} failed: {error}"
+            )
+        new_retries: Dict[str, int] = {}
+        for retry in self.reporter.retries[retries:]:
+            new_retries[retry["step"]] = new_retries.get(retry["step"], 0) + 1
+        self.iterations.append(
+            {
+                "iteration": len(self.iterations) + 1,
+                "started_at": time.time() - self.started_at,
+                "duration": time.perf_counter() - started,
+                "failed": error is not None,
+                "error": error,
+                "retries": new_retries,
+                "steps": self.steps,
+                "local_storage_kb": self._local_storage_kb(),
+            }
+        )
+
+    def _local_storage_kb(self) -> Optional[float]:
+        """How big the application data (all kept in the localStorage) got, to explain any slowdown."""
+        try:
+            size = self.reporter.page.evaluate("JSON.stringify(localStorage).length")
+        except Exception:
+            return None
+        return round(size / 1024, 1)
+
+    def error_rate(self) -> float:
+        failed = sum(iteration["failed"] for iteration in self.iterations)
+        return failed / len(self.iterations) if self.iterations else 0.0
+
+    def step_started(self, name: str):
+        pass
+
+    def step_finished(self, name: str, duration: float, failed: bool):
+        # steps can run more than once in an iteration (e.g. LoginManager.navigate)
+        self.steps[name] = self.steps.get(name, 0.0) + duration
+
+
+class SoakPlugin:
+    """
+    Pytest plugin for soak tests (marked with `soak`), which repeat a journey for `--soak-iterations`
+    or `--soak-hours` on the same browser. They are skipped unless one of these is given.
+
+    Iterations of each test are saved to `reports/soak.json`, and the latency drift of each step
+    shows up in the HTML report.
+    """
+
+    def __init__(self, config: pytest.Config, path: Path = Path("reports/soak.json")):
+        self.config = config
+        self.path = path
+        # Per test (nodeid), its iterations (see SoakRecorder)
+        self.iterations: Dict[str, List[Dict]] = {}
+
+    def enabled(self) -> bool:
+        return bool(
+            self.config.getoption("soak_iterations")
+            or self.config.getoption("soak_hours")
+        )
+
+    def pytest_collection_modifyitems(self, items: List[pytest.Item]):
+        if self.enabled():
+            return
+        skip = pytest.mark.skip(reason="soak test, see --soak-iterations/--soak-hours")
+        for item in items:
+            if item.get_closest_marker("soak"):
+                item.add_marker(skip)
+
+    def pytest_report_header(self, config: pytest.Config):
+        if self.enabled():
+            return (
+                f"soak: {config.getoption('soak_iterations') or 'unlimited'} iterations, "
+                f"{config.getoption('soak_hours') or 'unlimited'} hours"
+            )
+
+    @staticmethod
+    def summary(iterations: List[Dict]) -> Dict:
+        """Sums up the iterations of a soak test: error rate, retries per step, and latency drift per step."""
+        failed = sum(iteration["failed"] for iteration in iterations)
+        retries: Dict[str, int] = {}
+        for iteration in iterations:
+            for step, count in iteration["retries"].items():
+                retries[step] = retries.get(step, 0) + count
+        return {
+            "iterations": len(iterations),
+            "failed": failed,
+            "error_rate": failed / len(iterations),
+            "retries": retries,
+            "drift": latency_drift(iterations),
+        }
+
+    def _soaks(self) -> Dict[str, List[Dict]]:
+        return {
+            nodeid: iterations
+            for nodeid, iterations in self.iterations.items()
+            if iterations
+        }
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        soaks = self._soaks()
+        if soaks:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(
+                json.dumps(
+                    {
+                        nodeid: {
+                            "summary": self.summary(iterations),
+                            "iterations": iterations,
+                        }
+                        for nodeid, iterations in soaks.items()
+                    },
+                    indent=2,
+                )
+            )
+
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        """Adds, per soak test, its error rate, retries, and the latency drift of each step."""
+        for nodeid, iterations in self._soaks().items():
+            soak = self.summary(iterations)
+            retries = ", ".join(
+                f"{escape(step)}: {count}" for step, count in soak["retries"].items()
+            )
+            rows = "".join(
+                f"<tr><td>{escape(step)}</td><td>{drift['first']:.2f}</td>"
+                f"<td>{drift['last']:.2f}</td><td>{drift['drift']:+.0%}</td></tr>"
+                for step, drift in soak["drift"].items()
+            )
+            postfix.append(
+                f"<h2>Soak: {escape(nodeid)} ({soak['iterations']} iterations)</h2>"
+                f"<p>Error rate: {soak['error_rate']:.1%}, retries: {retries or 'none'}</p>"
+                "<table><tr><th>Step</th><th>First p50 (s)</th><th>Last p50 (s)</th>"
+                f"<th>Drift</th></tr>{rows}</table>"
+            )
@@ -0,0 +1,34 @@
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile, which (unlike an interpolated one) is always one of the observed values.
+
+    Args:
+        values (Sequence[float]): The observed values (not necessarily sorted).
+        q (float): The percentile to compute, between 0 and 100.
+
+    Returns:
+        float: The percentile, or 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def describe(values: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarises a list of observed values (such as durations) into the figures we show in reports.
+    """
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values, default=0.0),
+    }
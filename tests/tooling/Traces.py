@@ -0,0 +1,210 @@
+import io
+import json
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from .Results import artifact_name
+from .Stats import describe
+
+# Locators built with get_by_role(..., name=...) end up in selectors like: internal:role=button[name="Transactions"i]
+SELECTOR_NAME = re.compile(r'name="((?:[^"\\]|\\.)*)"')
+
+
+def _action_label(event: Dict) -> str:
+    """
+    Builds a readable label for an action, such as `click "Transactions"` or `expect to.be.visible "Home"`.
+    """
+    params = event.get("params") or {}
+    label = event.get("method", "")
+    if params.get("expression"):
+        label = f"{label} {params['expression']}"
+    if params.get("url"):
+        return f"{label} {params['url']}"
+    if params.get("selector"):
+        match = SELECTOR_NAME.search(params["selector"])
+        return f'{label} "{match.group(1) if match else params["selector"]}"'
+    return label
+
+
+def _lines(archive: zipfile.ZipFile, name: str):
+    """
+    Streams the JSON events of one file inside the trace, without extracting it.
+    """
+    with archive.open(name) as raw:
+        for line in io.TextIOWrapper(raw, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarise_trace(path: str) -> Dict:
+    """
+    Reads a single trace.zip (streaming its events) and extracts the raw figures we care about:
+    how long each action took, how long we waited on the network, and what screenshots cost.
+
+    Args:
+        path (str): The trace file.
+
+    Returns:
+        Dict: The raw figures (all durations in milliseconds), to be aggregated by `summarise_traces`.
+    """
+    actions: Dict[str, List[float]] = {}
+    network: List[Dict] = []
+    screenshots = {"durations": [], "frames": 0, "frame_bytes": 0}
+    started: Dict[str, Dict] = {}
+    with zipfile.ZipFile(path) as archive:
+        resources = {info.filename: info.file_size for info in archive.infolist()}
+        for name in resources:
+            if name.endswith(".trace"):
+                for event in _lines(archive, name):
+                    if event["type"] == "before" and event.get("class") != "Tracing":
+                        started[event["callId"]] = event
+                    elif event["type"] == "after" and event["callId"] in started:
+                        before = started.pop(event["callId"])
+                        duration = event["endTime"] - before["startTime"]
+                        if before.get("method") == "screenshot":
+                            screenshots["durations"].append(duration)
+                        else:
+                            actions.setdefault(_action_label(before), []).append(
+                                duration
+                            )
+                    elif event["type"] == "screencast-frame":
+                        screenshots["frames"] += 1
+                        screenshots["frame_bytes"] += resources.get(
+                            f"resources/{event['sha1']}", 0
+                        )
+            elif name.endswith(".network"):
+                for event in _lines(archive, name):
+                    if event["type"] != "resource-snapshot":
+                        continue
+                    entry = event["snapshot"]
+                    network.append(
+                        {
+                            "url": entry["request"]["url"].split("?")[0],
+                            "wait": max(entry.get("timings", {}).get("wait", 0), 0),
+                            "time": max(entry.get("time", 0), 0),
+                        }
+                    )
+    return {"actions": actions, "network": network, "screenshots": screenshots}
+
+
+def summarise_traces(paths: List[Path], slowest: int = 10) -> Dict:
+    """
+    Summarises many traces at once (each one in its own process) into per action latencies,
+    network waits, and screenshot costs for the whole session.
+
+    Args:
+        paths (List[Path]): The trace files.
+        slowest (int, optional): How many of the slowest network resources to list. Defaults to 10.
+
+    Returns:
+        Dict: The summary (all durations in milliseconds), which is also what we save as JSON.
+    """
+    actions: Dict[str, List[float]] = {}
+    network: List[Dict] = []
+    screenshot_durations: List[float] = []
+    frames = frame_bytes = 0
+    with ProcessPoolExecutor() as executor:
+        for trace in executor.map(summarise_trace, [str(path) for path in paths]):
+            for label, durations in trace["actions"].items():
+                actions.setdefault(label, []).extend(durations)
+            network.extend(trace["network"])
+            screenshot_durations.extend(trace["screenshots"]["durations"])
+            frames += trace["screenshots"]["frames"]
+            frame_bytes += trace["screenshots"]["frame_bytes"]
+    return {
+        "traces": len(paths),
+        "actions": dict(
+            sorted(
+                ((label, describe(durations)) for label, durations in actions.items()),
+                key=lambda item: -item[1]["total"],
+            )
+        ),
+        "network": {
+            "wait": describe([resource["wait"] for resource in network]),
+            "time": describe([resource["time"] for resource in network]),
+            "slowest": sorted(network, key=lambda resource: -resource["time"])[
+                :slowest
+            ],
+        },
+        "screenshots": {
+            **describe(screenshot_durations),
+            "screencast_frames": frames,
+            "screencast_bytes": frame_bytes,
+        },
+    }
+
+
+def summary_to_html(summary: Dict, limit: int = 30) -> str:
+    """
+    Renders the summary as HTML tables, to be added to the HTML report.
+    """
+    rows = "".join(
+        f"<tr><td>{escape(label)}</td><td>{figures['count']}</td>"
+        f"<td>{figures['p50']:.0f}</td><td>{figures['p95']:.0f}</td>"
+        f"<td>{figures['max']:.0f}</td><td>{figures['total']:.0f}</td></tr>"
+        for label, figures in list(summary["actions"].items())[:limit]
+    )
+    slowest = "".join(
+        f"<tr><td>{escape(resource['url'])}</td><td>{resource['wait']:.0f}</td>"
+        f"<td>{resource['time']:.0f}</td></tr>"
+        for resource in summary["network"]["slowest"]
+    )
+    network = summary["network"]
+    screenshots = summary["screenshots"]
+    return (
+        f"<h2>Performance (from {summary['traces']} traces)</h2>"
+        "<table><tr><th>Action</th><th>Count</th><th>p50 (ms)</th><th>p95 (ms)</th>"
+        f"<th>Max (ms)</th><th>Total (ms)</th></tr>{rows}</table>"
+        f"<p>Network: {network['time']['count']} requests, "
+        f"waiting p95 {network['wait']['p95']:.0f}ms "
+        f"(total {network['wait']['total']:.0f}ms)</p>"
+        "<table><tr><th>Slowest resources</th><th>Wait (ms)</th><th>Time (ms)</th></tr>"
+        f"{slowest}</table>"
+        f"<p>Screenshots: {screenshots['count']} taken in {screenshots['total']:.0f}ms "
+        f"(p95 {screenshots['p95']:.0f}ms), plus {screenshots['screencast_frames']} "
+        f"screencast frames ({screenshots['screencast_bytes'] / 1024:.0f}KB)</p>"
+    )
+
+
+class TracesPlugin:
+    """
+    Pytest plugin keeping track of the traces recorded in the session (by the `context` fixture),
+    summarising them in the end as JSON and in the HTML report.
+    """
+
+    def __init__(
+        self, config: pytest.Config, traces_dir: Path = Path("reports/traces")
+    ):
+        self.config = config
+        self.traces_dir = traces_dir
+        self.traces: Dict[str, Path] = {}
+        self.summary = None
+
+    def trace_path(self, nodeid: str) -> Path:
+        """
+        Gives the path where the trace of a test should be saved (and remembers it for the summary).
+        """
+        path = self.traces_dir.joinpath(f"{artifact_name(nodeid)}.zip")
+        self.traces[nodeid] = path
+        return path
+
+    def pytest_sessionfinish(self, session: pytest.Session):
+        """Summarises all the traces of the session, saving it as JSON next to them."""
+        traces = [path for path in self.traces.values() if path.exists()]
+        if not traces:
+            return
+        self.summary = summarise_traces(traces)
+        self.traces_dir.joinpath("summary.json").write_text(
+            json.dumps(self.summary, indent=2)
+        )
+
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        """Adds the performance summary (per action latencies, network and screenshots) to the HTML report."""
+        if self.summary:
+            postfix.append(summary_to_html(self.summary))
@@ -0,0 +1,199 @@
+import io
+from base64 import b64encode
+from html import escape
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+import pytest_html
+
+from .Results import artifact_name
+
+# Images are compared in square tiles of this many pixels, skipping the identical ones at once
+TILE = 32
+
+
+def _load(png: bytes):
+    """Decodes a PNG into an array of RGB pixels (height x width x 3)."""
+    import numpy
+    from PIL import Image
+
+    return numpy.asarray(Image.open(io.BytesIO(png)).convert("RGB"))
+
+
+def _tiles(image, tile: int):
+    """
+    Views an image as tiles (rows x columns x tile x tile x 3), padding its edges (with black) to fit a whole tile.
+    """
+    import numpy
+
+    height, width = image.shape[:2]
+    padded = numpy.pad(
+        image, ((0, -height % tile), (0, -width % tile), (0, 0)), mode="constant"
+    )
+    rows, columns = padded.shape[0] // tile, padded.shape[1] // tile
+    return padded.reshape(rows, tile, columns, tile, 3).swapaxes(1, 2)
+
+
+def compare(golden: bytes, actual: bytes, threshold: int, tile: int = TILE) -> Dict:
+    """
+    Compares two screenshots, pixel by pixel, using array operations only.
+
+    Each tile is first checked for equality as a whole (a single pass over both images), so only the tiles
+    that changed get their pixels diffed. A pixel differs when any of its channels changed more than `threshold`.
+
+    Args:
+        golden (bytes): The golden image (PNG).
+        actual (bytes): The screenshot just taken (PNG).
+        threshold (int): How much (0-255) a channel may change and still count as the same (e.g. antialiasing).
+        tile (int, optional): The size of the tiles, in pixels. Defaults to TILE.
+
+    Returns:
+        Dict: The `ratio` of differing pixels (1.0 if sizes differ), how many `tiles` changed out of the `total`,
+        and the `diff` image (PNG, the actual one with differing pixels in red) if any pixel differs.
+    """
+    import numpy
+    from PIL import Image
+
+    expected, image = _load(golden), _load(actual)
+    if expected.shape != image.shape:
+        return {"ratio": 1.0, "tiles": None, "total": None, "diff": actual}
+    expected_tiles, tiles = _tiles(expected, tile), _tiles(image, tile)
+    changed = numpy.any(expected_tiles != tiles, axis=(2, 3, 4))
+    result = {"ratio": 0.0, "tiles": int(changed.sum()), "total": changed.size}
+    if not result["tiles"]:
+        return result
+    # Only diff the pixels of the tiles that changed
+    delta = numpy.abs(
+        expected_tiles[changed].astype(numpy.int16) - tiles[changed].astype(numpy.int16)
+    )
+    differing = delta.max(axis=-1) > threshold
+    result["ratio"] = float(differing.sum()) / (image.shape[0] * image.shape[1])
+    if result["ratio"]:
+        marked = tiles.copy()
+        marked_tiles = marked[changed]
+        marked_tiles[differing] = (255, 0, 0)
+        marked[changed] = marked_tiles
+        rows, columns = marked.shape[:2]
+        marked = marked.swapaxes(1, 2).reshape(rows * tile, columns * tile, 3)
+        output = io.BytesIO()
+        Image.fromarray(marked[: image.shape[0], : image.shape[1]]).save(
+            output, format="PNG"
+        )
+        result["diff"] = output.getvalue()
+    return result
+
+
+class VisualCheck:
+    """
+    Compares the snapshots of a test with their golden images (see `Reporter.snapshot`).
+
+    Golden images live in `tests/visual/<test>/<snapshot name>.png` (one folder per test and browser,
+    as browsers render differently). Missing ones are created, and `--visual-update` replaces the ones that differ.
+    """
+
+    def __init__(self, plugin: "VisualPlugin", nodeid: str, extras: List):
+        self.plugin = plugin
+        self.nodeid = nodeid
+        self.extras = extras
+        self.golden_dir = plugin.golden_dir.joinpath(artifact_name(nodeid))
+        self.mismatches: List[str] = []
+
+    def check(self, name: str, png: bytes):
+        """
+        Compares a snapshot with its golden image, saving (and adding to the report) a diff image only on mismatch.
+
+        Args:
+            name (str): The name of the snapshot, unique within the test.
+            png (bytes): The snapshot.
+        """
+        golden = self.golden_dir.joinpath(f"{artifact_name(name)}.png")
+        if not golden.exists():
+            golden.parent.mkdir(parents=True, exist_ok=True)
+            golden.write_bytes(png)
+            self.plugin.results.append((self.nodeid, name, "new", None))
+            return
+        result = compare(
+            golden.read_bytes(),
+            png,
+            threshold=self.plugin.config.option.visual_threshold,
+        )
+        if result["ratio"] <= self.plugin.config.option.visual_tolerance:
+            self.plugin.results.append((self.nodeid, name, "passed", result["ratio"]))
+            return
+        if self.plugin.config.option.visual_update:
+            golden.write_bytes(png)
+            self.plugin.results.append((self.nodeid, name, "updated", result["ratio"]))
+            return
+        diff = self.plugin.diff_dir.joinpath(
+            artifact_name(self.nodeid), f"{artifact_name(name)}.png"
+        )
+        diff.parent.mkdir(parents=True, exist_ok=True)
+        diff.write_bytes(result["diff"])
+        self.extras.append(
+            pytest_html.extras.png(
+                b64encode(result["diff"]).decode("ascii"), name=f"Visual diff: {name}"
+            )
+        )
+        self.mismatches.append(f"{name} ({result['ratio']:.2%} of pixels differ)")
+        self.plugin.results.append((self.nodeid, name, "failed", result["ratio"]))
+
+
+class VisualPlugin:
+    """
+    Pytest plugin for visual checks (`--visual`): tests whose snapshots differ from their golden images fail,
+    once they are done (so a visual difference doesn't hide whatever comes next in the test).
+
+    NumPy and Pillow are only needed (and imported) when visual checks are on.
+    """
+
+    def __init__(
+        self,
+        config: pytest.Config,
+        golden_dir: Path = Path(__file__).parent.parent.joinpath("visual"),
+        diff_dir: Path = Path("reports/visual"),
+    ):
+        try:
+            import numpy  # noqa: F401
+            import PIL  # noqa: F401
+        except ImportError as error:
+            raise pytest.UsageError(
+                f"--visual needs numpy and Pillow installed ({error})"
+            )
+        self.config = config
+        self.golden_dir = golden_dir
+        self.diff_dir = diff_dir
+        self.results: List[tuple] = []
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call):
+        """Fails a test that passed if any of its snapshots did not match."""
+        outcome = yield
+        report = outcome.get_result()
+        reporter = item.funcargs.get("reporter") if hasattr(item, "funcargs") else None
+        visual: VisualCheck = getattr(reporter, "visual", None)
+        if report.when != "call" or visual is None or not visual.mismatches:
+            return
+        if report.passed:
+            report.outcome = "failed"
+            report.longrepr = "Visual check failed for: " + ", ".join(visual.mismatches)
+
+    def pytest_html_results_summary(self, prefix, summary, postfix, session):
+        """Adds the outcome of each visual check that did not simply pass."""
+        counts: Dict[str, int] = {}
+        for _, _, outcome, _ in self.results:
+            counts[outcome] = counts.get(outcome, 0) + 1
+        if not counts:
+            return
+        rows = "".join(
+            f"<tr><td>{escape(nodeid)}</td><td>{escape(name)}</td><td>{outcome}</td>"
+            f"<td>{'' if ratio is None else f'{ratio:.2%}'}</td></tr>"
+            for nodeid, name, outcome, ratio in self.results
+            if outcome != "passed"
+        )
+        postfix.append(
+            "<h2>Visual checks</h2><p>"
+            + ", ".join(f"{count} {outcome}" for outcome, count in counts.items())
+            + "</p><table><tr><th>Test</th><th>Snapshot</th><th>Outcome</th>"
+            f"<th>Differing pixels</th></tr>{rows}</table>"
+        )
@@ -0,0 +1 @@
+"""Tooling package: pytest plugins and command line helpers around our test runs."""
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def base_url():
+    """
+    Unit tests don't use the application, so there is no base url (and no need to check it's up before running them).
+    """
+    return None
@@ -0,0 +1,13 @@
+from tooling.AdaptiveTimeouts import MAX_TIMEOUT, MIN_TIMEOUT, learn_timeouts
+
+
+def test_learn_timeouts():
+    """Timeouts are the p99 times the safety factor, clamped, and only for call sites with enough waits"""
+    waits = {
+        "fast": [10.0] * 10,
+        "usual": [100.0] * 9 + [300.0],
+        "slow": [9_000.0] * 10,
+        "unknown": [100.0] * 9,
+    }
+    timeouts = learn_timeouts(waits, safety_factor=3, min_samples=10)
+    assert timeouts == {"fast": MIN_TIMEOUT, "usual": 900.0, "slow": MAX_TIMEOUT}
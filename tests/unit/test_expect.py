@@ -0,0 +1,28 @@
+import sys
+
+from pages.base.Expect import _site
+
+
+def expect(actual):
+    """Stands in for our `expect`, giving the call site it would key assertions by"""
+    return _site(sys._getframe(1))
+
+
+def _checks():
+    sites = [expect(None)]
+    for _ in range(2):
+        sites.append(
+            expect(
+                None,
+            )
+        )
+    return sites
+
+
+def test_call_sites_are_numbered_within_their_function():
+    """Call sites are named by function and ordinal, the same each time they run"""
+    assert _checks() == [
+        "_checks#1",
+        "_checks#2",
+        "_checks#2",
+    ]
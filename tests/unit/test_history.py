@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+
+from tooling.History import balance_shards, failed_first, shared_durations
+
+
+def test_balance_shards_spreads_longest_tests_first():
+    """Longest tests go to different shards, and every test lands in exactly one shard"""
+    durations = {"a": 10.0, "b": 9.0, "c": 2.0, "d": 1.0}
+    shards = balance_shards(list(durations), durations, 2)
+    assert sorted(sum(shards, [])) == ["a", "b", "c", "d"]
+    assert [sum(durations[n] for n in shard) for shard in shards] == [11.0, 11.0]
+
+
+def test_balance_shards_is_the_same_on_every_shard():
+    """Shards compute the same split no matter the order tests were collected in"""
+    nodeids = [f"test_{index}" for index in range(7)]
+    assert balance_shards(nodeids, {}, 3) == balance_shards(nodeids[::-1], {}, 3)
+
+
+def test_balance_shards_without_durations_splits_by_count():
+    """Without any duration (e.g. no durations file), shards get the same number of tests"""
+    shards = balance_shards([f"test_{index}" for index in range(7)], {}, 3)
+    assert sorted(len(shard) for shard in shards) == [2, 2, 3]
+
+
+def test_shared_durations(tmp_path):
+    """Durations come from the durations file only, and there are none without it"""
+    path = tmp_path.joinpath("durations.json")
+    path.write_text(json.dumps({"a": 1.5}))
+    assert shared_durations(str(path)) == {"a": 1.5}
+    assert shared_durations(None) == {}
+
+
+def _item(nodeid, browser):
+    return SimpleNamespace(
+        nodeid=nodeid, callspec=SimpleNamespace(params={"browser_name": browser})
+    )
+
+
+def test_failed_first_keeps_each_browser_in_one_block():
+    """Failing tests go first within their browser, so each browser is still launched once"""
+    items = [
+        _item("a[chromium]", "chromium"),
+        _item("b[chromium]", "chromium"),
+        _item("a[firefox]", "firefox"),
+        _item("b[firefox]", "firefox"),
+    ]
+    ordered = failed_first(items, {"b[chromium]": 0, "b[firefox]": 0})
+    assert [item.nodeid for item in ordered] == [
+        "b[chromium]",
+        "a[chromium]",
+        "b[firefox]",
+        "a[firefox]",
+    ]
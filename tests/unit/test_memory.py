@@ -0,0 +1,12 @@
+import pytest
+from tooling.Memory import monotonic_growth
+
+
+def test_monotonic_growth():
+    """Only series that keep growing (allowing for a bit of noise) are flagged"""
+    assert monotonic_growth([100, 110, 120, 130]) == pytest.approx(0.3)
+    assert monotonic_growth([100, 99, 120, 130]) is not None
+    assert monotonic_growth([100, 80, 120, 130]) is None
+    assert monotonic_growth([100, 110, 120]) is None
+    assert monotonic_growth([130, 120, 110, 100]) is None
+    assert monotonic_growth([100, None, 110, 120, 130]) is not None
@@ -0,0 +1,61 @@
+import json
+
+from tooling.ResultsMerge import merge, read_results
+
+
+def _results_file(path, shard_id, tests):
+    session = {
+        "type": "session",
+        "browsers": ["chromium"],
+        "shard": [shard_id, 2],
+        "html_report": f"report_{shard_id}.html",
+    }
+    path.write_text("\n".join(json.dumps(entry) for entry in [session] + tests) + "\n")
+    return path
+
+
+def _test(nodeid, outcome, **extra):
+    return {
+        "type": "test",
+        "nodeid": nodeid,
+        "outcome": outcome,
+        "duration": 1.0,
+        "properties": {},
+        "artifacts": [],
+        **extra,
+    }
+
+
+def test_merge(tmp_path):
+    """Shards are merged into one report, linking their HTML reports and telling why tests failed"""
+    results = [
+        _results_file(
+            tmp_path.joinpath("shard_0.jsonl"),
+            0,
+            [
+                _test("test_a", "passed"),
+                _test("test_b", "failed", longrepr="AssertionError: <boom>"),
+            ],
+        ),
+        _results_file(
+            tmp_path.joinpath("shard_1.jsonl"),
+            1,
+            [
+                _test(
+                    "test_c",
+                    "passed",
+                    artifacts=[
+                        {"kind": "image", "name": "", "path": "artifacts/1.png"}
+                    ],
+                )
+            ],
+        ),
+    ]
+    output = tmp_path.joinpath("merged", "index.html")
+    assert merge(results, output) == {"passed": 2, "failed": 1}
+    html = output.read_text()
+    assert html.count("<tr><td") == 3
+    assert "AssertionError: &lt;boom&gt;" in html
+    assert 'href="../report_1.html"' in html
+    assert 'src="../artifacts/1.png"' in html
+    assert len(list(read_results(results[0]))) == 3
@@ -0,0 +1,18 @@
+from tooling.Soak import latency_drift
+
+
+def _iteration(failed=False, **steps):
+    return {"failed": failed, "steps": steps}
+
+
+def test_latency_drift():
+    """Drift compares the median of the first and last iterations, leaving failed ones out"""
+    iterations = (
+        [_iteration(deposit=1.0, withdraw=1.0)] * 10
+        + [_iteration(failed=True, deposit=100.0)]
+        + [_iteration(deposit=2.0, withdraw=1.0)] * 10
+    )
+    drift = latency_drift(iterations)
+    assert list(drift) == ["deposit", "withdraw"]
+    assert drift["deposit"] == {"first": 1.0, "last": 2.0, "drift": 1.0}
+    assert drift["withdraw"]["drift"] == 0.0
@@ -0,0 +1,18 @@
+from tooling.Stats import describe, percentile
+
+
+def test_percentile_is_an_observed_value():
+    """Nearest-rank percentiles are always one of the values"""
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) == 0.0
+
+
+def test_describe():
+    summary = describe([1.0, 2.0, 3.0, 4.0])
+    assert summary["count"] == 4
+    assert summary["total"] == 10.0
+    assert summary["mean"] == 2.5
+    assert summary["max"] == 4.0
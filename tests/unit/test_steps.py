@@ -0,0 +1,108 @@
+import logging
+import time
+
+import pytest
+from pages.base.Reporter import Reporter
+from pages.base.Step import step
+from playwright.sync_api import Error, TimeoutError
+
+
+class _Listener:
+    def __init__(self):
+        self.durations = {}
+
+    def step_started(self, name: str):
+        pass
+
+    def step_finished(self, name: str, duration: float, failed: bool):
+        self.durations[name] = duration
+
+
+def test_step_durations_leave_overhead_out():
+    """Our overhead (e.g. checkpoints) is left out of the running steps, nested ones included"""
+    reporter = Reporter(None, logging.getLogger("test"), [])
+    listener = _Listener()
+    reporter.step_listeners.append(listener)
+    with reporter.step("outer"):
+        with reporter.step("inner"):
+            with reporter.overhead():
+                time.sleep(0.2)
+            time.sleep(0.05)
+    assert 0.05 <= listener.durations["inner"] < 0.15
+    assert 0.05 <= listener.durations["outer"] < 0.15
+
+
+class _Context:
+    def __init__(self):
+        self.calls = []
+
+    def storage_state(self):
+        return {"cookies": [], "origins": []}
+
+    def clear_cookies(self):
+        self.calls.append("clear_cookies")
+
+
+class _Page:
+    """Just enough of a page for steps to take and restore checkpoints"""
+
+    def __init__(self):
+        self.url = "https://bank.test/#/account"
+        self.context = _Context()
+        self.calls = self.context.calls
+
+    def goto(self, url: str):
+        self.calls.append(f"goto {url}")
+
+    def evaluate(self, script: str, items):
+        self.calls.append("evaluate")
+
+    def reload(self):
+        self.calls.append("reload")
+
+
+class _PageObject:
+    def __init__(self, *failures: Error):
+        self.page = _Page()
+        self.reporter = Reporter(self.page, logging.getLogger("test"), [])
+        self.failures = list(failures)
+        self.attempts = 0
+
+    @step
+    def act(self):
+        self.attempts += 1
+        if self.failures:
+            raise self.failures.pop(0)
+
+
+def test_step_does_not_retry_element_timeouts():
+    """A click timing out (e.g. the element is gone) fails at once, without restoring the checkpoint"""
+    page_object = _PageObject(TimeoutError("Locator.click: Timeout 1000ms exceeded."))
+    with pytest.raises(TimeoutError):
+        page_object.act()
+    assert page_object.attempts == 1
+    assert page_object.page.calls == []
+
+
+def test_step_retries_navigation_timeouts_from_its_checkpoint():
+    """A navigation timeout is retried, after bringing the browser back to where the step started"""
+    page_object = _PageObject(
+        TimeoutError("Page.goto: Timeout 30000ms exceeded."),
+        Error("Page.reload: net::ERR_CONNECTION_RESET"),
+    )
+    page_object.act()
+    assert page_object.attempts == 3
+    assert (
+        page_object.page.calls
+        == [
+            "clear_cookies",
+            "goto https://bank.test/#/account",
+            "evaluate",
+            "reload",
+        ]
+        * 2
+    )
+    assert [retry["step"] for retry in page_object.reporter.retries] == [
+        "_PageObject.act",
+        "_PageObject.act",
+    ]
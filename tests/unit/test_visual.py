@@ -0,0 +1,52 @@
+import io
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from tooling.Visual import compare  # noqa: E402
+
+
+def _png(pixels) -> bytes:
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def image():
+    return numpy.random.default_rng(0).integers(0, 255, (70, 100, 3), dtype=numpy.uint8)
+
+
+def test_compare_identical(image):
+    """Identical images have no changed tile and no diff image"""
+    result = compare(_png(image), _png(image), threshold=0)
+    assert result["ratio"] == 0.0
+    assert result["tiles"] == 0
+    assert "diff" not in result
+
+
+def test_compare_changed_region(image):
+    """Only the changed pixels count, and are the ones marked in red in the diff image"""
+    changed = image.copy()
+    changed[65:70, 96:100] = 255 - changed[65:70, 96:100] // 2
+    result = compare(_png(image), _png(changed), threshold=0)
+    assert result["ratio"] == pytest.approx(20 / (70 * 100), abs=0.001)
+    assert result["tiles"] == 1
+    diff = numpy.asarray(Image.open(io.BytesIO(result["diff"])))
+    assert diff.shape == image.shape
+    assert (diff[65:70, 96:100] == (255, 0, 0)).all()
+    assert (diff[:65] == changed[:65]).all()
+
+
+def test_compare_threshold(image):
+    """Small changes (such as antialiasing) are ignored within the threshold"""
+    changed = image.copy()
+    changed[:10, :10] = numpy.clip(changed[:10, :10].astype(int) + 3, 0, 255)
+    assert compare(_png(image), _png(changed), threshold=5)["ratio"] == 0.0
+    assert compare(_png(image), _png(changed), threshold=0)["ratio"] > 0.0
+
+
+def test_compare_different_sizes(image):
+    assert compare(_png(image), _png(image[:50]), threshold=0)["ratio"] == 1.0